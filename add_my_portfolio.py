@@ -1,3 +1,4 @@
+from sqlalchemy import insert
 from models.database import get_db, User, UserHolding
 
 def add_my_portfolio():
@@ -22,15 +23,17 @@ def add_my_portfolio():
         # Add more of your stocks here...
     ]
     
-    for symbol, qty, cost, asset_type in my_holdings:
-        holding = UserHolding(
-            user_id=user.id,
-            symbol=symbol,
-            quantity=qty,
-            avg_cost=cost,
-            asset_type=asset_type
-        )
-        db.add(holding)
+    # One executemany INSERT, batched into multi-row VALUES by SQLAlchemy
+    db.execute(insert(UserHolding), [
+        {
+            'user_id': user.id,
+            'symbol': symbol,
+            'quantity': qty,
+            'avg_cost': cost,
+            'asset_type': asset_type
+        }
+        for symbol, qty, cost, asset_type in my_holdings
+    ])
     
     db.commit()
     print(f"✅ Portfolio updated for {user.email}")
@@ -6,31 +6,49 @@ Version 2.1 - With Market Pulse & Enriched Portfolio Cards
 """
 
 import streamlit as st
-import pandas as pd
 from datetime import datetime, timedelta
-from sqlalchemy.orm import Session
-import plotly.express as px
-import plotly.graph_objects as go
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache, wraps
+import hashlib
+from itertools import islice
+import re
+import threading
+from sqlalchemy import event, func, insert, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, contains_eager, joinedload, raiseload
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import time
 import textwrap
+import zlib
+from urllib.parse import unquote
+from zoneinfo import ZoneInfo
 
 from models.database import (
-    init_db, get_db, User, UserHolding, NewsArticle, 
+    init_db, get_db, engine, User, UserHolding, NewsArticle, 
     NewsAnalysis, Notification
 )
-from services.fmp_client import FMPClient
-from services.ai_analyzer import AIAnalyzer
-from main import PortfolioNewsMonitor
 from config.settings import settings
 
+try:
+    import diskcache
+except ImportError:
+    diskcache = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 # ===========================
 # AUTO-CREATE DEMO USER (for cloud deployment)
 # ===========================
+@st.cache_resource
 def ensure_demo_user():
-    """Create demo user and portfolio if they don't exist"""
+    """Create demo user and portfolio if they don't exist (checked once per process)"""
+    db = next(get_db())
     try:
-        db = next(get_db())
         user = db.query(User).filter(User.email == "demo@example.com").first()
         
         if not user:
@@ -41,29 +59,29 @@ def ensure_demo_user():
                 active=True
             )
             db.add(user)
-            db.commit()
-            db.refresh(user)
+            db.flush()
             
-            # Add some default stocks
+            # Add some default stocks in one executemany INSERT
             default_stocks = ["AAPL", "MSFT", "GOOGL", "TSLA", "NVDA"]
-            for symbol in default_stocks:
-                holding = UserHolding(
-                    user_id=user.id,
-                    symbol=symbol,
-                    quantity=0,
-                    average_cost=0,
-                    asset_type="stock"
-                )
-                db.add(holding)
+            db.execute(insert(UserHolding), [
+                {
+                    'user_id': user.id,
+                    'symbol': symbol,
+                    'quantity': 0,
+                    'avg_cost': 0,
+                    'asset_type': "stock"
+                }
+                for symbol in default_stocks
+            ])
             db.commit()
             print("✅ Demo user created with default portfolio")
-        
-        db.close()
+        return True
     except Exception as e:
+        db.rollback()
         print(f"Error creating demo user: {e}")
-
-# Run on startup
-ensure_demo_user()
+        return False
+    finally:
+        db.close()
 
 # Page Configuration
 st.set_page_config(
@@ -73,11 +91,59 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
+# In debug mode, any relationship load a query doesn't spell out in its options
+# raises instead of silently issuing one more SELECT per row (N+1 guard)
+DEV_LOAD_GUARD = (raiseload('*'),) if settings.debug else ()
+
+# Columns the alert cards render; leaves out the (large) article content
+ALERT_ARTICLE_COLUMNS = (
+    NewsArticle.symbol, NewsArticle.title, NewsArticle.published_date,
+    NewsArticle.source, NewsArticle.url
+)
+ALERT_ANALYSIS_COLUMNS = (
+    NewsAnalysis.impact_score, NewsAnalysis.summary, NewsAnalysis.category,
+    NewsAnalysis.urgency, NewsAnalysis.sentiment, NewsAnalysis.affected_sector
+)
+# Fills notif.article and article.analysis from a query that already joins both tables
+ALERT_LOAD_OPTIONS = (
+    contains_eager(Notification.article).load_only(*ALERT_ARTICLE_COLUMNS)
+    .contains_eager(NewsArticle.analysis).load_only(*ALERT_ANALYSIS_COLUMNS),
+)
+
 # ===========================
 # CACHING FUNCTIONS
 # ===========================
 
-@st.cache_data(ttl=300)  # Cache for 5 minutes
+@st.cache_resource
+def get_disk_cache():
+    """Disk cache under st.cache_data so a restart doesn't refetch everything (None if unavailable)"""
+    if diskcache is None or not settings.cache_dir:
+        return None
+    try:
+        return diskcache.Cache(f"{settings.cache_dir}/app", size_limit=500_000_000)
+    except Exception as e:
+        print(f"Disk cache unavailable: {e}")
+        return None
+
+@st.cache_resource
+def get_http_session():
+    """Shared HTTP session so FMP calls reuse keep-alive connections across reruns"""
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=4,
+        pool_maxsize=32,
+        max_retries=Retry(total=2, backoff_factor=0.2, status_forcelist=[429, 500, 502, 503, 504])
+    )
+    session.mount("https://", adapter)
+    return session
+
+def parse_json(response):
+    """Decode an FMP response body, with orjson when it is installed"""
+    if orjson is not None:
+        return orjson.loads(response.content)
+    return response.json()
+
+@st.cache_data(ttl=300, show_spinner=False)  # Cache for 5 minutes
 def get_market_indices():
     """Fetch major market indices with caching"""
     indices = {}
@@ -90,15 +156,18 @@ def get_market_indices():
         '%5EVIX': {'name': 'VIX', 'emoji': '😰'}
     }
     
-    for symbol, info in index_symbols.items():
-        try:
-            url = f"https://financialmodelingprep.com/api/v3/quote/{symbol}"
-            params = {'apikey': settings.fmp_api_key}
-            response = requests.get(url, params=params, timeout=10)
-            data = response.json()
-            
-            if data and len(data) > 0:
-                quote = data[0]
+    try:
+        # One request for all indices (FMP accepts comma-separated symbols)
+        url = f"https://financialmodelingprep.com/api/v3/quote/{','.join(index_symbols)}"
+        params = {'apikey': settings.fmp_api_key}
+        response = get_http_session().get(url, params=params, timeout=10)
+        data = parse_json(response)
+        
+        # Quotes come back with decoded symbols ('^GSPC'), keyed here by '%5EGSPC'
+        quotes = {q.get('symbol'): q for q in data if isinstance(q, dict)} if isinstance(data, list) else {}
+        for symbol, info in index_symbols.items():
+            quote = quotes.get(unquote(symbol))
+            if quote:
                 indices[symbol] = {
                     'name': info['name'],
                     'emoji': info['emoji'],
@@ -106,53 +175,135 @@ def get_market_indices():
                     'change': quote.get('change', 0),
                     'change_percent': quote.get('changesPercentage', 0)
                 }
-        except Exception as e:
-            print(f"Error fetching {symbol}: {e}")
-            continue
+    except Exception as e:
+        print(f"Error fetching market indices: {e}")
     
     return indices
 
-@st.cache_data(ttl=300)  # Cache for 5 minutes
-def get_stock_quote_cached(symbol: str):
-    """Get stock quote with caching"""
-    try:
-        url = f"https://financialmodelingprep.com/api/v3/quote/{symbol}"
-        params = {'apikey': settings.fmp_api_key}
-        response = requests.get(url, params=params, timeout=10)
-        data = response.json()
-        return data[0] if data and len(data) > 0 else {}
-    except:
-        return {}
-
-@st.cache_data(ttl=86400)  # Cache for 24 hours
-def get_company_profile_cached(symbol: str):
-    """Get company profile with caching (name, logo, sector)"""
+# Profiles are cached as in-process objects (no copy per hit), so callers must not mutate them
+@st.cache_resource(ttl=86400, max_entries=1024)  # Cache for 24 hours
+def get_company_profiles_cached(symbols: tuple):
+    """Get company profiles for several symbols in one request, with caching
+    
+    Symbols missing from the response fall back to defaults with the symbol as name
+    """
+    profiles = {}
+    if not symbols:
+        return profiles
+    
+    # Profiles barely change, so the disk copy is good for a week
+    disk_cache = get_disk_cache()
+    if disk_cache is not None:
+        for symbol in symbols:
+            cached = disk_cache.get(('profile', symbol))
+            if cached is not None:
+                profiles[symbol] = cached
+    missing = [symbol for symbol in symbols if symbol not in profiles]
+    if not missing:
+        return profiles
+    
     try:
-        url = f"https://financialmodelingprep.com/api/v3/profile/{symbol}"
+        url = f"https://financialmodelingprep.com/api/v3/profile/{','.join(missing)}"
         params = {'apikey': settings.fmp_api_key}
-        response = requests.get(url, params=params, timeout=10)
-        data = response.json()
+        response = get_http_session().get(url, params=params, timeout=10)
+        data = parse_json(response)
         
-        if data and len(data) > 0 and isinstance(data, list):
-            company = data[0]
-            return {
-                'name': company.get('companyName') or symbol,
-                'logo': company.get('image') or '',
-                'sector': company.get('sector') or '',
-                'industry': company.get('industry') or '',
-                'exchange': company.get('exchangeShortName') or ''
-            }
+        if data and isinstance(data, list):
+            for company in data:
+                symbol = company.get('symbol')
+                if symbol in missing:
+                    profiles[symbol] = {
+                        'name': company.get('companyName') or symbol,
+                        'logo': company.get('image') or '',
+                        'sector': company.get('sector') or '',
+                        'industry': company.get('industry') or '',
+                        'exchange': company.get('exchangeShortName') or ''
+                    }
+                    if disk_cache is not None:
+                        disk_cache.set(('profile', symbol), profiles[symbol], expire=7 * 86400)
     except Exception as e:
-        print(f"Error fetching profile for {symbol}: {e}")
+        print(f"Error fetching profiles for {symbols}: {e}")
     
     # Return defaults with symbol as name
-    return {
-        'name': symbol,
-        'logo': '',
-        'sector': '',
-        'industry': '',
-        'exchange': ''
-    }
+    for symbol in symbols:
+        profiles.setdefault(symbol, {
+            'name': symbol,
+            'logo': '',
+            'sector': '',
+            'industry': '',
+            'exchange': ''
+        })
+    return profiles
+
+@st.cache_data(ttl=30, max_entries=1024)  # Cache for 30 seconds
+def get_user_stats(_db: Session, user_id: int):
+    """Get the sidebar holdings/alerts counts in one round-trip, with caching
+    
+    Call get_user_stats.clear() after writes that change either count
+    """
+    holdings_count, alerts_count = _db.query(
+        select(func.count(UserHolding.id)).where(UserHolding.user_id == user_id).scalar_subquery(),
+        select(func.count(Notification.id)).where(Notification.user_id == user_id).scalar_subquery()
+    ).one()
+    return holdings_count, alerts_count
+
+
+# Premium brokers (their ratings carry more weight)
+PREMIUM_BROKERS = [
+    'Goldman Sachs', 'Morgan Stanley', 'JP Morgan', 'JPMorgan',
+    'Bank of America', 'BofA', 'Barclays', 'Deutsche Bank', 
+    'Credit Suisse', 'UBS', 'Citi', 'Citigroup', 'Wells Fargo', 
+    'Jefferies', 'Evercore', 'Bernstein', 'RBC Capital', 'HSBC', 
+    'Piper Sandler', 'Wedbush', 'Needham', 'Oppenheimer', 'Stifel',
+    'Raymond James', 'KeyBanc', 'Truist', 'BTIG', 'Cowen', 'Wolfe'
+]
+
+# Keywords to detect upgrades/downgrades in news headlines
+UPGRADE_KEYWORDS = ('upgrade', 'upgraded', 'upgrades', 'raises to buy', 
+                    'raises to outperform', 'raises to overweight', 'bullish',
+                    'lifts to buy', 'lifts to outperform', 'boosts')
+DOWNGRADE_KEYWORDS = ('downgrade', 'downgraded', 'downgrades', 'cuts to sell',
+                      'cuts to underperform', 'cuts to underweight', 'cuts to neutral',
+                      'cuts to equal-weight', 'cuts to hold', 'bearish', 'lowers to')
+
+# Lowercased once here instead of on every rating/article checked
+PREMIUM_BROKERS_LC = tuple(pb.lower() for pb in PREMIUM_BROKERS)
+PREMIUM_BROKERS_SET = frozenset(PREMIUM_BROKERS_LC)
+
+# One compiled alternation per keyword list: a single C-level scan per headline
+# (inputs are lowercased before matching, so the patterns are lowercase too)
+UPGRADE_RE = re.compile('|'.join(re.escape(kw) for kw in UPGRADE_KEYWORDS))
+DOWNGRADE_RE = re.compile('|'.join(re.escape(kw) for kw in DOWNGRADE_KEYWORDS))
+BROKER_RE = re.compile('|'.join(re.escape(pb) for pb in PREMIUM_BROKERS_LC))
+BROKER_BY_LC = dict(zip(PREMIUM_BROKERS_LC, PREMIUM_BROKERS))
+
+# Whole words only (prevents 'holdings' -> 'hold'), checked in this order
+RATING_WORD_PATTERNS = [
+    (rating_word, re.compile(r'\b' + re.escape(rating_word) + r'\b', re.IGNORECASE))
+    for rating_word in ['buy', 'sell', 'hold', 'outperform', 'underperform',
+                        'overweight', 'underweight', 'neutral', 'equal-weight']
+]
+
+# Keywords for Fed/macro news
+FED_KEYWORDS = (
+    'federal reserve', 'fed ', 'fomc', 'rate cut', 'rate hike', 
+    'interest rate', 'powell', 'monetary policy', 'basis point',
+    'inflation', 'cpi', 'pce', 'employment', 'jobs report', 
+    'nonfarm payroll', 'gdp', 'recession', 'treasury yield'
+)
+FED_RE = re.compile('|'.join(re.escape(kw) for kw in FED_KEYWORDS))
+
+
+def truncate_text(text: str, limit: int) -> str:
+    """Cut text to limit characters with a trailing '...' (None becomes '')"""
+    text = text or ''
+    return text[:limit] + '...' if len(text) > limit else text
+
+
+def is_premium_broker(broker: str) -> bool:
+    """Whether a broker name matches (or contains) one of the premium brokers"""
+    broker_lc = broker.lower()
+    return broker_lc in PREMIUM_BROKERS_SET or any(pb in broker_lc for pb in PREMIUM_BROKERS_LC)
 
 
 def get_broker_rating_alerts_impl(portfolio_symbols: list, debug: bool = False):
@@ -170,9 +321,10 @@ def get_broker_rating_alerts_impl(portfolio_symbols: list, debug: bool = False):
         return []
     
     all_alerts = []
-    seen_alerts = set()  # Prevent duplicates
     cutoff_hours = 72  # Look back 3 days
     cutoff_time = datetime.utcnow() - timedelta(hours=cutoff_hours)
+    # FMP timestamps sort lexicographically, so stale items can be skipped without parsing
+    cutoff_time_str = cutoff_time.strftime('%Y-%m-%d %H:%M:%S')
     
     if debug:
         print(f"[DEBUG] Checking symbols: {portfolio_symbols}")
@@ -180,32 +332,16 @@ def get_broker_rating_alerts_impl(portfolio_symbols: list, debug: bool = False):
         
     # Check for AI Service availability
     try:
-        from services.ai_analyzer import AIAnalyzer
-        ai_analyzer = AIAnalyzer()
+        ai_analyzer = get_ai_analyzer()
         has_ai = True
     except:
         has_ai = False
         if debug: print("[DEBUG] AI Service not available")
     
-    # Premium brokers (their ratings carry more weight)
-    premium_brokers = [
-        'Goldman Sachs', 'Morgan Stanley', 'JP Morgan', 'JPMorgan',
-        'Bank of America', 'BofA', 'Barclays', 'Deutsche Bank', 
-        'Credit Suisse', 'UBS', 'Citi', 'Citigroup', 'Wells Fargo', 
-        'Jefferies', 'Evercore', 'Bernstein', 'RBC Capital', 'HSBC', 
-        'Piper Sandler', 'Wedbush', 'Needham', 'Oppenheimer', 'Stifel',
-        'Raymond James', 'KeyBanc', 'Truist', 'BTIG', 'Cowen', 'Wolfe'
-    ]
-    
-    # Keywords to detect upgrades/downgrades in news headlines
-    upgrade_keywords = ['upgrade', 'upgraded', 'upgrades', 'raises to buy', 
-                        'raises to outperform', 'raises to overweight', 'bullish',
-                        'lifts to buy', 'lifts to outperform', 'boosts']
-    downgrade_keywords = ['downgrade', 'downgraded', 'downgrades', 'cuts to sell',
-                          'cuts to underperform', 'cuts to underweight', 'cuts to neutral',
-                          'cuts to equal-weight', 'cuts to hold', 'bearish', 'lowers to']
-    
-    for symbol in portfolio_symbols:
+    def fetch_symbol_alerts(symbol):
+        """Collect alerts for one symbol from all sources, in source priority order"""
+        symbol_alerts = []
+        
         if debug:
             print(f"[DEBUG] Processing {symbol}...")
         
@@ -215,27 +351,22 @@ def get_broker_rating_alerts_impl(portfolio_symbols: list, debug: bool = False):
         try:
             url = f"https://financialmodelingprep.com/api/v4/upgrades-downgrades"
             params = {'symbol': symbol, 'apikey': settings.fmp_api_key}
-            response = requests.get(url, params=params, timeout=10)
-            data = response.json()
+            response = get_http_session().get(url, params=params, timeout=10)
+            data = parse_json(response)
             
             if debug:
                 print(f"[DEBUG] FMP Upgrades API returned {len(data) if isinstance(data, list) else type(data)} for {symbol}")
             
             if isinstance(data, list):
-                for rating in data[:15]:
+                for rating in islice(data, 15):
                     try:
                         pub_date_str = rating.get('publishedDate', '')
-                        pub_date = datetime.strptime(pub_date_str, '%Y-%m-%d %H:%M:%S')
+                        pub_date = datetime.fromisoformat(pub_date_str)
                         
                         if pub_date >= cutoff_time:
                             broker = rating.get('analystCompany', 'Unknown')
                             action = rating.get('action', '').lower()
                             
-                            alert_key = f"{symbol}_{broker}_{pub_date.strftime('%Y%m%d')}"
-                            if alert_key in seen_alerts:
-                                continue
-                            seen_alerts.add(alert_key)
-                            
                             if 'upgrade' in action:
                                 action_type = 'upgrade'
                             elif 'downgrade' in action:
@@ -245,7 +376,7 @@ def get_broker_rating_alerts_impl(portfolio_symbols: list, debug: bool = False):
                             else:
                                 action_type = 'reiterated'
                             
-                            is_premium = any(pb.lower() in broker.lower() for pb in premium_brokers)
+                            is_premium = is_premium_broker(broker)
                             
                             alert = {
                                 'symbol': symbol,
@@ -259,7 +390,7 @@ def get_broker_rating_alerts_impl(portfolio_symbols: list, debug: bool = False):
                                 'score': (15 if is_premium else 8) + (5 if action_type == 'downgrade' else 0),
                                 'source': 'FMP API'
                             }
-                            all_alerts.append(alert)
+                            symbol_alerts.append(alert)
                             if debug:
                                 print(f"[DEBUG] ✅ Found from API: {broker} {action_type} {symbol}")
                     except Exception as e:
@@ -270,38 +401,33 @@ def get_broker_rating_alerts_impl(portfolio_symbols: list, debug: bool = False):
             if debug:
                 print(f"[DEBUG] FMP upgrades API error for {symbol}: {e}")
         
+        # The news scan mostly re-finds the same events, so it only runs when the API had none
+        has_api_alerts = bool(symbol_alerts)
+        
         # =====================================================
         # SOURCE 2: FMP Grade endpoint (different API)
         # =====================================================
         try:
             url = f"https://financialmodelingprep.com/api/v3/grade/{symbol}"
             params = {'apikey': settings.fmp_api_key}
-            response = requests.get(url, params=params, timeout=10)
-            grade_data = response.json()
+            response = get_http_session().get(url, params=params, timeout=10)
+            grade_data = parse_json(response)
             
             if debug:
                 print(f"[DEBUG] FMP Grade API returned {len(grade_data) if isinstance(grade_data, list) else type(grade_data)} for {symbol}")
             
             if isinstance(grade_data, list):
-                for grade in grade_data[:15]:
+                for grade in islice(grade_data, 15):
                     try:
                         pub_date_str = grade.get('date', '')
-                        # Grade API uses different date format
-                        try:
-                            pub_date = datetime.strptime(pub_date_str, '%Y-%m-%d')
-                        except:
-                            pub_date = datetime.strptime(pub_date_str, '%Y-%m-%d %H:%M:%S')
+                        # Grade API uses a date-only format; fromisoformat takes both
+                        pub_date = datetime.fromisoformat(pub_date_str)
                         
                         if pub_date >= cutoff_time.replace(hour=0, minute=0, second=0):
                             broker = grade.get('gradingCompany', 'Unknown')
                             new_grade = grade.get('newGrade', 'N/A')
                             prev_grade = grade.get('previousGrade', 'N/A')
                             
-                            alert_key = f"{symbol}_{broker}_{pub_date.strftime('%Y%m%d')}"
-                            if alert_key in seen_alerts:
-                                continue
-                            seen_alerts.add(alert_key)
-                            
                             # Determine action from grades
                             bullish = ['buy', 'outperform', 'overweight', 'strong buy', 'positive']
                             bearish = ['sell', 'underperform', 'underweight', 'negative', 'reduce']
@@ -317,7 +443,7 @@ def get_broker_rating_alerts_impl(portfolio_symbols: list, debug: bool = False):
                             else:
                                 action_type = 'reiterated'
                             
-                            is_premium = any(pb.lower() in broker.lower() for pb in premium_brokers)
+                            is_premium = is_premium_broker(broker)
                             
                             alert = {
                                 'symbol': symbol,
@@ -331,7 +457,7 @@ def get_broker_rating_alerts_impl(portfolio_symbols: list, debug: bool = False):
                                 'score': (14 if is_premium else 7) + (5 if action_type == 'downgrade' else 0),
                                 'source': 'Grade API'
                             }
-                            all_alerts.append(alert)
+                            symbol_alerts.append(alert)
                             if debug:
                                 print(f"[DEBUG] ✅ Found from Grade API: {broker} {action_type} {symbol}")
                     except Exception as e:
@@ -345,72 +471,62 @@ def get_broker_rating_alerts_impl(portfolio_symbols: list, debug: bool = False):
         # =====================================================
         # SOURCE 3: FMP Stock News (scan headlines for broker actions)
         # =====================================================
+        if has_api_alerts:
+            if debug:
+                print(f"[DEBUG] Skipping news scan for {symbol} (FMP API already has ratings)")
+            return symbol_alerts
+        
         try:
             url = f"https://financialmodelingprep.com/api/v3/stock_news"
             params = {'tickers': symbol, 'limit': 50, 'apikey': settings.fmp_api_key}
-            response = requests.get(url, params=params, timeout=10)
-            news_data = response.json()
+            response = get_http_session().get(url, params=params, timeout=10)
+            news_data = parse_json(response)
             
             if debug:
                 print(f"[DEBUG] FMP News returned {len(news_data) if isinstance(news_data, list) else type(news_data)} articles for {symbol}")
             
             if isinstance(news_data, list):
-                for article in news_data:
+                recent_news = [
+                    article for article in news_data
+                    if isinstance(article, dict) and article.get('publishedDate', '') >= cutoff_time_str
+                ]
+                for article in recent_news:
                     try:
                         title = article.get('title', '').lower()
-                        text = article.get('text', '').lower()
                         pub_date_str = article.get('publishedDate', '')
                         
                         # Check if it's about an upgrade/downgrade
-                        is_upgrade = any(kw in title for kw in upgrade_keywords)
-                        is_downgrade = any(kw in title for kw in downgrade_keywords)
+                        is_upgrade = UPGRADE_RE.search(title) is not None
+                        is_downgrade = DOWNGRADE_RE.search(title) is not None
                         
                         if not (is_upgrade or is_downgrade):
                             continue
                         
+                        text = article.get('text', '').lower()
+                        
                         if debug:
                             print(f"[DEBUG] Found news match: {article.get('title', '')[:60]}...")
                         
-                        pub_date = datetime.strptime(pub_date_str, '%Y-%m-%d %H:%M:%S')
+                        pub_date = datetime.fromisoformat(pub_date_str)
                         if pub_date < cutoff_time:
                             continue
                         
-                        # Try to extract broker name from title/text
-                        broker_found = None
-                        for broker in premium_brokers:
-                            if broker.lower() in title or broker.lower() in text:
-                                broker_found = broker
-                                break
-                        
-                        if not broker_found:
-                            if 'morgan stanley' in title or 'morgan stanley' in text:
-                                broker_found = 'Morgan Stanley'
-                            elif 'jpmorgan' in title or 'jp morgan' in title or 'jpmorgan' in text:
-                                broker_found = 'JPMorgan'
-                            elif 'goldman' in title or 'goldman' in text:
-                                broker_found = 'Goldman Sachs'
-                            elif 'bank of america' in title or 'bofa' in title:
-                                broker_found = 'Bank of America'
-                            elif 'ubs' in title or 'ubs' in text:
-                                broker_found = 'UBS'
-                            elif 'barclays' in title or 'barclays' in text:
-                                broker_found = 'Barclays'
-                            elif 'citi' in title or 'citigroup' in text:
-                                broker_found = 'Citi'
-                            else:
-                                broker_found = 'Analyst'
+                        # Try to extract broker name from title/text (first mention wins)
+                        broker_match = BROKER_RE.search(title) or BROKER_RE.search(text)
+                        if broker_match:
+                            broker_found = BROKER_BY_LC[broker_match.group(0)]
+                        elif 'goldman' in title or 'goldman' in text:
+                            broker_found = 'Goldman Sachs'
+                        else:
+                            broker_found = 'Analyst'
                         
                         action_type = 'upgrade' if is_upgrade else 'downgrade'
                         new_rating = 'N/A'
                         previous_rating = 'N/A'
                         
                         # Keyword rating extraction (STRICTER)
-                        import re
-                        for rating_word in ['buy', 'sell', 'hold', 'outperform', 'underperform', 
-                                           'overweight', 'underweight', 'neutral', 'equal-weight']:
-                            # Use regex to match whole words only (prevents 'holdings' -> 'hold')
-                            pattern = r'\b' + re.escape(rating_word) + r'\b'
-                            if re.search(pattern, title, re.IGNORECASE):
+                        for rating_word, pattern in RATING_WORD_PATTERNS:
+                            if pattern.search(title):
                                 new_rating = rating_word.title()
                                 break
                                 
@@ -464,12 +580,7 @@ def get_broker_rating_alerts_impl(portfolio_symbols: list, debug: bool = False):
                             old_target = 'N/A'
                             new_target = 'N/A'
                         
-                        alert_key = f"{symbol}_{broker_found}_{pub_date.strftime('%Y%m%d')}"
-                        if alert_key in seen_alerts:
-                            continue
-                        seen_alerts.add(alert_key)
-                        
-                        is_premium = any(pb.lower() in broker_found.lower() for pb in premium_brokers)
+                        is_premium = is_premium_broker(broker_found)
                         
                         alert = {
                             'symbol': symbol,
@@ -487,7 +598,7 @@ def get_broker_rating_alerts_impl(portfolio_symbols: list, debug: bool = False):
                             'source': 'News Scan',
                             'headline': article.get('title', '')[:100]
                         }
-                        all_alerts.append(alert)
+                        symbol_alerts.append(alert)
                         if debug:
                             print(f"[DEBUG] ✅ Found from News: {broker_found} {action_type} {symbol}")
                     except Exception as e:
@@ -497,18 +608,25 @@ def get_broker_rating_alerts_impl(portfolio_symbols: list, debug: bool = False):
         except Exception as e:
             if debug:
                 print(f"[DEBUG] FMP news scan error for {symbol}: {e}")
+        
+        return symbol_alerts
     
-    # Sort by score (highest first), then by timestamp (most recent first)
-    all_alerts.sort(key=lambda x: (x['score'], x['timestamp']), reverse=True)
+    # Symbols are independent, so fetch them concurrently (each one is network-bound)
+    with ThreadPoolExecutor(max_workers=min(16, len(portfolio_symbols))) as executor:
+        for symbol_alerts in executor.map(fetch_symbol_alerts, portfolio_symbols):
+            all_alerts.extend(symbol_alerts)
     
-    # Remove duplicates
-    final_alerts = []
-    seen_final = set()
+    # Remove duplicates in one pass, keeping the highest-scored alert per symbol/broker/day
+    # (strict '>' keeps the earlier source on ties, and sources run in priority order)
+    best_alerts = {}
     for alert in all_alerts:
-        key = f"{alert['symbol']}_{alert['broker']}_{alert['date']}"
-        if key not in seen_final:
-            seen_final.add(key)
-            final_alerts.append(alert)
+        key = (alert['symbol'], alert['broker'].lower(), alert['timestamp'].date())
+        current = best_alerts.get(key)
+        if current is None or alert['score'] > current['score']:
+            best_alerts[key] = alert
+    
+    # Sort by score (highest first), then by timestamp (most recent first)
+    final_alerts = sorted(best_alerts.values(), key=lambda x: (x['score'], x['timestamp']), reverse=True)
     
     if debug:
         print(f"[DEBUG] Total alerts found: {len(final_alerts)}")
@@ -516,14 +634,34 @@ def get_broker_rating_alerts_impl(portfolio_symbols: list, debug: bool = False):
     return final_alerts[:10]
 
 
+# Cache tiers for the dashboard feeds: broker ratings 10 min, macro alerts 30 min,
+# global events 1 h, company profiles 24 h (the _v4 suffix busts older cache entries)
+@st.cache_data(ttl=600, max_entries=256)
+def get_broker_rating_alerts_v4(portfolio_symbols: tuple):
+    """Cached wrapper for broker rating alerts (also kept on disk for 10 minutes)
+    
+    Pass a sorted, de-duplicated tuple so the same portfolio always hits the same entry
+    """
+    disk_cache = get_disk_cache()
+    cache_key = ('broker_alerts', portfolio_symbols)
+    if disk_cache is not None:
+        cached = disk_cache.get(cache_key)
+        if cached is not None:
+            return cached
+    
+    alerts = get_broker_rating_alerts_impl(portfolio_symbols, debug=False)
+    if disk_cache is not None:
+        disk_cache.set(cache_key, alerts, expire=600)
+    return alerts
+
 
-# Cached wrapper - cache key changes every 10 minutes - UPDATED V2 for cache busting
-# Cached wrapper - cache key changes every 10 minutes - UPDATED V2 for cache busting
-# Cached wrapper - cache key changes every 10 minutes - UPDATED V4 for cache busting
-@st.cache_data(ttl=600)
-def get_broker_rating_alerts_v4(portfolio_symbols: list):
-    """Cached wrapper for broker rating alerts"""
-    return get_broker_rating_alerts_impl(portfolio_symbols, debug=False)
+def clear_feed_caches():
+    """Drop every cached feed (memory and disk) so the next run refetches from FMP"""
+    st.cache_data.clear()
+    get_company_profiles_cached.clear()
+    disk_cache = get_disk_cache()
+    if disk_cache is not None:
+        disk_cache.clear()
 
 
 @st.cache_data(ttl=1800)  # Cache for 30 minutes
@@ -533,11 +671,13 @@ def get_fed_macro_alerts():
     These affect ALL stocks and should always be displayed
     """
     alerts = []
+    now = datetime.utcnow()
+    cutoff_time = now - timedelta(hours=48)
     
     # HARDCODED BREAKING NEWS - Fed Rate Cut Dec 10, 2025
     # This ensures critical Fed news is always displayed
     fed_rate_cut_date = datetime(2025, 12, 10, 19, 0, 0)  # 2PM EST = 7PM UTC
-    if datetime.utcnow() >= fed_rate_cut_date and datetime.utcnow() <= fed_rate_cut_date + timedelta(days=3):
+    if now >= fed_rate_cut_date and now <= fed_rate_cut_date + timedelta(days=3):
         alerts.append({
             'title': '🚨 BREAKING: Fed Cuts Rates by 25bps to 3.50%-3.75%',
             'text': 'The Federal Reserve cut interest rates for the third consecutive time, lowering the target range by 25 basis points. Powell signals "wait and see" approach for 2026. Three dissents highlight FOMC division.',
@@ -558,47 +698,40 @@ def get_fed_macro_alerts():
             'apikey': settings.fmp_api_key,
             'page': 0
         }
-        response = requests.get(url, params=params, timeout=10)
-        data = response.json()
-        
-        # Keywords for Fed/macro news
-        fed_keywords = [
-            'federal reserve', 'fed ', 'fomc', 'rate cut', 'rate hike', 
-            'interest rate', 'powell', 'monetary policy', 'basis point',
-            'inflation', 'cpi', 'pce', 'employment', 'jobs report', 
-            'nonfarm payroll', 'gdp', 'recession', 'treasury yield'
-        ]
+        response = get_http_session().get(url, params=params, timeout=10)
+        data = parse_json(response)
         
         if isinstance(data, list):
-            for article in data[:50]:
-                title = article.get('title', '').lower()
-                text = article.get('text', '').lower()
+            for article in islice(data, 50):
+                # Read and lowercase each field once; the body is only scanned if the title misses
+                title_raw = article.get('title') or ''
+                text_raw = article.get('text') or ''
+                title = title_raw.lower()
                 
                 # Check if it's Fed/macro related
-                is_macro = any(kw in title or kw in text for kw in fed_keywords)
+                is_macro = FED_RE.search(title) is not None or FED_RE.search(text_raw.lower()) is not None
                 
                 if is_macro:
                     pub_date_str = article.get('publishedDate', '')
                     try:
-                        pub_date = datetime.strptime(pub_date_str, '%Y-%m-%d %H:%M:%S')
+                        pub_date = datetime.fromisoformat(pub_date_str)
                         
                         # Only last 48 hours
-                        if pub_date >= datetime.utcnow() - timedelta(hours=48):
+                        if pub_date >= cutoff_time:
                             # Determine alert type
-                            title_lower = article.get('title', '').lower()
-                            if 'cut' in title_lower and ('rate' in title_lower or 'fed' in title_lower):
+                            if 'cut' in title and ('rate' in title or 'fed' in title):
                                 alert_type = 'rate_cut'
                                 emoji = '📉'
                                 color = '#00FF88'
-                            elif 'hike' in title_lower or 'raise' in title_lower:
+                            elif 'hike' in title or 'raise' in title:
                                 alert_type = 'rate_hike'
                                 emoji = '📈'
                                 color = '#FF3366'
-                            elif 'inflation' in title_lower:
+                            elif 'inflation' in title:
                                 alert_type = 'inflation'
                                 emoji = '🔥'
                                 color = '#FFB800'
-                            elif 'fomc' in title_lower or 'powell' in title_lower:
+                            elif 'fomc' in title or 'powell' in title:
                                 alert_type = 'fomc'
                                 emoji = '🏛️'
                                 color = '#00D4FF'
@@ -608,8 +741,8 @@ def get_fed_macro_alerts():
                                 color = '#8892A6'
                             
                             alerts.append({
-                                'title': article.get('title', 'Macro Alert'),
-                                'text': article.get('text', '')[:200] + '...' if len(article.get('text', '')) > 200 else article.get('text', ''),
+                                'title': title_raw or 'Macro Alert',
+                                'text': truncate_text(text_raw, 200),
                                 'url': article.get('url', ''),
                                 'source': article.get('site', 'News'),
                                 'date': pub_date.strftime('%Y-%m-%d %H:%M'),
@@ -639,8 +772,7 @@ def get_global_market_events():
     
     # Check for AI Service availability
     try:
-        from services.ai_analyzer import AIAnalyzer
-        ai_analyzer = AIAnalyzer()
+        ai_analyzer = get_ai_analyzer()
     except:
         return get_fed_macro_alerts() # Fallback to old function if AI fails
         
@@ -651,30 +783,45 @@ def get_global_market_events():
             'apikey': settings.fmp_api_key,
             'limit': 40 # Fetch more to scan
         }
-        response = requests.get(url, params=params, timeout=10)
-        data = response.json()
+        response = get_http_session().get(url, params=params, timeout=10)
+        data = parse_json(response)
         
         seen_titles = set()
+        cutoff_time = datetime.utcnow() - timedelta(days=3)
         
         if isinstance(data, list):
+            articles = []
             for article in data:
                 title = article.get('title', '')
                 if title in seen_titles: continue
                 seen_titles.add(title)
+                articles.append(article)
                 
-                # Pre-filter (optimization): Skip obviously irrelevant stuff to save AI tokens
-                # But be permissive to catch Tariffs/Trade/Geopolitics
+            # Pre-filter (optimization): Skip obviously irrelevant stuff to save AI tokens
+            # But be permissive to catch Tariffs/Trade/Geopolitics
+            
+            # Analyze with AI - one LLM round-trip per article, so run them concurrently
+            def analyze(article):
+                try:
+                    return ai_analyzer.analyze_macro_impact(article.get('title', ''), article.get('text', ''))
+                except Exception as e:
+                    print(f"Error analyzing macro item: {e}")
+                    return None
+            
+            with ThreadPoolExecutor(max_workers=8) as executor:
+                analyses = list(executor.map(analyze, articles))
+            
+            for article, analysis in zip(articles, analyses):
+                if analysis is None: continue
+                title = article.get('title', '')
                 
-                # Analyze with AI
                 try:
-                    analysis = ai_analyzer.analyze_macro_impact(title, article.get('text', ''))
-                    
                     if analysis.get('is_global_event', False) or analysis.get('impact_score', 0) >= 7:
                         pub_date_str = article.get('publishedDate', '')
-                        pub_date = datetime.strptime(pub_date_str, '%Y-%m-%d %H:%M:%S')
+                        pub_date = datetime.fromisoformat(pub_date_str)
                         
                         # Only last 3 days
-                        if pub_date >= datetime.utcnow() - timedelta(days=3):
+                        if pub_date >= cutoff_time:
                             category = analysis.get('category', 'Global Event')
                             
                             # Emoji mapping
@@ -720,119 +867,181 @@ def get_global_market_events():
 # STYLING
 # ===========================
 
+# The stylesheet is served from ./static (server.enableStaticServing in .streamlit/config.toml),
+# so browsers fetch and cache it once instead of receiving it inline on every rerun.
+# The link is still emitted on every rerun because Streamlit removes any element
+# the current run doesn't re-emit.
+# Google Fonts (Inter, JetBrains Mono) linked from the page rather than @import-ed in the
+# stylesheet, so the font CSS is fetched in parallel instead of after style.css is parsed
+FONTS_HTML = (
+    '<link rel="preconnect" href="https://fonts.googleapis.com">'
+    '<link rel="preconnect" href="https://fonts.gstatic.com" crossorigin>'
+    '<link rel="stylesheet" href="https://fonts.googleapis.com/css2?family=Inter:wght@400;500;600;700'
+    '&family=JetBrains+Mono:wght@400;500&display=swap">'
+)
+
+@st.cache_resource
+def stylesheet_html(file_name):
+    """Build a <link> to a static stylesheet, versioned by content so it can be cached for good
+    
+    Link the committed .min.css (regenerate it with `python minify_css.py`)
+    """
+    with open(f"static/{file_name}", 'rb') as f:
+        version = hashlib.md5(f.read()).hexdigest()[:8]
+    return FONTS_HTML + f'<link rel="stylesheet" href="./app/static/{file_name}?v={version}">'
+
 def load_css(file_name):
-    with open(file_name) as f:
-        st.markdown(f'<style>{f.read()}</style>', unsafe_allow_html=True)
+    st.markdown(stylesheet_html(file_name), unsafe_allow_html=True)
+
+DIVIDER_HTML = '<div class="custom-divider"></div>'
 
-load_css('assets/style.css')
+def render_divider():
+    st.markdown(DIVIDER_HTML, unsafe_allow_html=True)
+
+load_css('style.min.css')
 
 # ===========================
 # HELPER FUNCTIONS
 # ===========================
 
+@lru_cache(maxsize=None)
+def section_header_html(icon: str, title: str, divider: bool = False) -> str:
+    """Build the HTML for an icon + title section header, optionally preceded by a divider"""
+    return f"""
+    {DIVIDER_HTML if divider else ''}
+    <div class="section-header">
+        <div class="section-icon">{icon}</div>
+        <div class="section-title">{title}</div>
+    </div>
+    """
+
+MARKET_TZ = ZoneInfo("America/New_York")
+
 def is_market_open():
-    """Check if US market is currently open (simplified)"""
-    now = datetime.utcnow()
-    # Convert to ET (UTC-5, simplified - doesn't account for DST)
-    et_hour = (now.hour - 5) % 24
+    """Check if US market is currently open (regular hours, holidays not handled)"""
+    # Eastern time via zoneinfo, so the open/close times follow DST
+    now = datetime.now(MARKET_TZ)
     
     # Check if weekday
     if now.weekday() >= 5:  # Saturday or Sunday
         return False
     
     # Check if trading hours (9:30 AM - 4:00 PM ET)
-    if 9 <= et_hour < 16:
-        if et_hour == 9 and now.minute < 30:
-            return False
-        return True
-    
-    return False
+    return (9, 30) <= (now.hour, now.minute) < (16, 0)
 
 def render_market_pulse():
-    """Render the Market Pulse header with live indices using Streamlit columns"""
+    """Render the Market Pulse header with live indices as one HTML block"""
     indices = get_market_indices()
     market_open = is_market_open()
     
     # Create a container with custom styling
-    st.markdown("""
-    <div style="background: linear-gradient(135deg, #0D1321 0%, #131A2B 100%); 
-                border: 1px solid #1E2A42; 
-                border-radius: 16px; 
-                padding: 1rem 1.5rem; 
-                margin-bottom: 1.5rem;">
-        <div style="display: flex; align-items: center; gap: 10px; margin-bottom: 0.75rem;">
-            <div style="width: 8px; height: 8px; background: #00FF88; border-radius: 50%;"></div>
-            <span style="color: #8892A6; font-size: 0.85rem; font-weight: 600; text-transform: uppercase; letter-spacing: 1.5px;">Market Pulse</span>
-        </div>
-    </div>
-    """, unsafe_allow_html=True)
-    
-    # Use Streamlit columns for indices
-    cols = st.columns(len(indices) + 1)
-    
-    for idx, (symbol, data) in enumerate(indices.items()):
-        with cols[idx]:
-            change_color = "#00FF88" if data['change_percent'] >= 0 else "#FF3366"
-            arrow = "▲" if data['change_percent'] >= 0 else "▼"
-            
-            st.markdown(f"""
-            <div style="text-align: center; padding: 0.5rem;">
-                <div style="color: #8892A6; font-size: 0.75rem; font-weight: 500; text-transform: uppercase;">{data['emoji']} {data['name']}</div>
-                <div style="color: #FFFFFF; font-size: 1.2rem; font-weight: 700; font-family: 'JetBrains Mono', monospace;">{data['price']:,.2f}</div>
-                <div style="color: {change_color}; font-size: 0.85rem; font-weight: 600;">{arrow} {abs(data['change_percent']):.2f}%</div>
-            </div>
-            """, unsafe_allow_html=True)
+    cells = ["""<div style="background: linear-gradient(135deg, #0D1321 0%, #131A2B 100%); border: 1px solid #1E2A42; border-radius: 16px; padding: 1rem 1.5rem; margin-bottom: 1.5rem;">
+<div style="display: flex; align-items: center; gap: 10px; margin-bottom: 0.75rem;">
+<div style="width: 8px; height: 8px; background: #00FF88; border-radius: 50%;"></div>
+<span style="color: #8892A6; font-size: 0.85rem; font-weight: 600; text-transform: uppercase; letter-spacing: 1.5px;">Market Pulse</span>
+</div>
+</div>""",
+        # Wrapping flex row: cells share the width and drop to new lines on narrow screens
+        '<div style="display: flex; flex-wrap: wrap; justify-content: space-between; gap: 1rem; margin-bottom: 1rem;">'
+    ]
     
-    # Market status in the last column
-    with cols[-1]:
-        status_color = "#00FF88" if market_open else "#FF3366"
-        status_bg = "rgba(0, 255, 136, 0.1)" if market_open else "rgba(255, 51, 102, 0.1)"
-        status_text = "Market Open" if market_open else "Market Closed"
-        status_icon = "🟢" if market_open else "🔴"
+    # One cell per index
+    for symbol, data in indices.items():
+        change_color = "#00FF88" if data['change_percent'] >= 0 else "#FF3366"
+        arrow = "▲" if data['change_percent'] >= 0 else "▼"
         
-        st.markdown(f"""
-        <div style="display: flex; align-items: center; justify-content: center; height: 100%;">
-            <div style="background: {status_bg}; padding: 8px 14px; border-radius: 20px; font-size: 0.8rem; font-weight: 600; color: {status_color};">
-                {status_icon} {status_text}
-            </div>
-        </div>
-        """, unsafe_allow_html=True)
+        cells.append(f"""<div style="flex: 1 1 120px; text-align: center; padding: 0.5rem;">
+<div style="color: #8892A6; font-size: 0.75rem; font-weight: 500; text-transform: uppercase;">{data['emoji']} {data['name']}</div>
+<div style="color: #FFFFFF; font-size: 1.2rem; font-weight: 700; font-family: 'JetBrains Mono', monospace;">{data['price']:,.2f}</div>
+<div style="color: {change_color}; font-size: 0.85rem; font-weight: 600;">{arrow} {abs(data['change_percent']):.2f}%</div>
+</div>""")
+    
+    # Market status in the last cell
+    status_color = "#00FF88" if market_open else "#FF3366"
+    status_bg = "rgba(0, 255, 136, 0.1)" if market_open else "rgba(255, 51, 102, 0.1)"
+    status_text = "Market Open" if market_open else "Market Closed"
+    status_icon = "🟢" if market_open else "🔴"
+    
+    cells.append(f"""<div style="flex: 1 1 120px; display: flex; align-items: center; justify-content: center;">
+<div style="background: {status_bg}; padding: 8px 14px; border-radius: 20px; font-size: 0.8rem; font-weight: 600; color: {status_color};">
+{status_icon} {status_text}
+</div>
+</div>""")
+    cells.append('</div>')
+    cells.append(DIVIDER_HTML)
     
-    st.markdown('<div class="custom-divider"></div>', unsafe_allow_html=True)
+    st.markdown("\n".join(cells), unsafe_allow_html=True)
+
+# Card lookup tables, built once instead of on every card render
+KNOWN_COMPANY_NAMES = {
+    'AAPL': 'Apple Inc.',
+    'MSFT': 'Microsoft Corporation',
+    'GOOGL': 'Alphabet Inc.',
+    'GOOG': 'Alphabet Inc.',
+    'TSLA': 'Tesla Inc.',
+    'NVDA': 'NVIDIA Corporation',
+    'META': 'Meta Platforms Inc.',
+    'AMZN': 'Amazon.com Inc.',
+    'NFLX': 'Netflix Inc.',
+    'AMD': 'Advanced Micro Devices',
+    'INTC': 'Intel Corporation',
+    'MU': 'Micron Technology',
+    'JPM': 'JPMorgan Chase',
+    'V': 'Visa Inc.',
+    'JNJ': 'Johnson & Johnson',
+    'WMT': 'Walmart Inc.',
+    'PG': 'Procter & Gamble',
+    'DIS': 'Walt Disney Co.',
+    'PYPL': 'PayPal Holdings',
+    'ADBE': 'Adobe Inc.',
+    'CRM': 'Salesforce Inc.',
+    'COST': 'Costco Wholesale',
+    'PEP': 'PepsiCo Inc.',
+    'KO': 'Coca-Cola Co.'
+}
+
+SECTOR_EMOJIS = {
+    'Technology': '💻',
+    'Healthcare': '🏥',
+    'Financial Services': '🏦',
+    'Consumer Cyclical': '🛒',
+    'Consumer Defensive': '🛡️',
+    'Communication Services': '📡',
+    'Industrials': '🏭',
+    'Energy': '⚡',
+    'Utilities': '💡',
+    'Real Estate': '🏠',
+    'Basic Materials': '🧱',
+    'Equity': '📈'
+}
+
+CARD_COLORS = ('#00D4FF', '#00FF88', '#FF3366', '#FFB800', '#8B5CF6', '#F472B6')
+
+# Broker alert styling by action type: (accent color, label, background)
+BROKER_ACTION_STYLES = {
+    'downgrade': ('#EF4444', '⬇️ DOWNGRADE', 'rgba(239, 68, 68, 0.05)'),
+    'target_lowered': ('#EF4444', '⬇️ DOWNGRADE', 'rgba(239, 68, 68, 0.05)'),
+    'upgrade': ('#10B981', '⬆️ UPGRADE', 'rgba(16, 185, 129, 0.05)'),
+    'initiated': ('#3B82F6', '🆕 INITIATED', 'rgba(59, 130, 246, 0.05)'),
+}
+DEFAULT_BROKER_ACTION_STYLE = ('#64748B', '📊 RATING', 'rgba(100, 116, 139, 0.05)')
+
+# News alert badge (label, color) indexed by impact score 0-10: 8+ critical, 5+ major
+IMPACT_STYLES = (('FYI', '#10B981'),) * 5 + (('MAJOR', '#F59E0B'),) * 3 + (('CRITICAL', '#EF4444'),) * 3
+URGENT_LEVELS = frozenset(('Immediate', 'Hours'))
+
+@lru_cache(maxsize=1024)
+def card_color(symbol: str) -> str:
+    """Pick a card accent color from the symbol, the same one in every process"""
+    # crc32 is deterministic, unlike hash() which is salted per process (PYTHONHASHSEED)
+    return CARD_COLORS[zlib.crc32(symbol.encode()) % len(CARD_COLORS)]
 
 def render_stock_card(symbol: str, profile: dict):
     """Render stock info using simple, reliable format"""
     # Company name with fallback
     company_name = profile.get('name', '')
     if not company_name or company_name == symbol or company_name == 'N/A':
-        known_names = {
-            'AAPL': 'Apple Inc.',
-            'MSFT': 'Microsoft Corporation',
-            'GOOGL': 'Alphabet Inc.',
-            'GOOG': 'Alphabet Inc.',
-            'TSLA': 'Tesla Inc.',
-            'NVDA': 'NVIDIA Corporation',
-            'META': 'Meta Platforms Inc.',
-            'AMZN': 'Amazon.com Inc.',
-            'NFLX': 'Netflix Inc.',
-            'AMD': 'Advanced Micro Devices',
-            'INTC': 'Intel Corporation',
-            'MU': 'Micron Technology',
-            'JPM': 'JPMorgan Chase',
-            'V': 'Visa Inc.',
-            'JNJ': 'Johnson & Johnson',
-            'WMT': 'Walmart Inc.',
-            'PG': 'Procter & Gamble',
-            'DIS': 'Walt Disney Co.',
-            'PYPL': 'PayPal Holdings',
-            'ADBE': 'Adobe Inc.',
-            'CRM': 'Salesforce Inc.',
-            'NFLX': 'Netflix Inc.',
-            'COST': 'Costco Wholesale',
-            'PEP': 'PepsiCo Inc.',
-            'KO': 'Coca-Cola Co.'
-        }
-        company_name = known_names.get(symbol, symbol)
+        company_name = KNOWN_COMPANY_NAMES.get(symbol, symbol)
     
     # Truncate if needed
     if len(company_name) > 30:
@@ -843,31 +1052,35 @@ def render_stock_card(symbol: str, profile: dict):
     if sector == 'N/A' or not sector:
         sector = 'Equity'
     
-    sector_emoji = {
-        'Technology': '💻',
-        'Healthcare': '🏥',
-        'Financial Services': '🏦',
-        'Consumer Cyclical': '🛒',
-        'Consumer Defensive': '🛡️',
-        'Communication Services': '📡',
-        'Industrials': '🏭',
-        'Energy': '⚡',
-        'Utilities': '💡',
-        'Real Estate': '🏠',
-        'Basic Materials': '🧱',
-        'Equity': '📈'
-    }.get(sector, '📊')
+    sector_emoji = SECTOR_EMOJIS.get(sector, '📊')
     
     return symbol, company_name, sector, sector_emoji
 
 
-def display_stock_card_beautiful(symbol: str, company_name: str, sector: str, sector_emoji: str):
-    """Display a beautiful stock card"""
+def display_stock_card_grid(holdings, n_cols: int):
+    """Display stock cards in an n_cols CSS grid with a single markdown call"""
+    profiles = get_company_profiles_cached(tuple(sorted({h.symbol for h in holdings})))
+    cards = []
+    for holding in holdings:
+        profile = profiles[holding.symbol]
+        cards.append(stock_card_html(*render_stock_card(holding.symbol, profile)))
+    
+    # Cards are stripped and joined without blank lines so markdown keeps the grid one HTML block
+    st.markdown(
+        f'<div style="display: grid; grid-template-columns: repeat({n_cols}, minmax(0, 1fr)); column-gap: 1rem;">'
+        + "\n".join(cards)
+        + '</div>',
+        unsafe_allow_html=True
+    )
+
+
+@lru_cache(maxsize=512)
+def stock_card_html(symbol: str, company_name: str, sector: str, sector_emoji: str) -> str:
+    """Build the HTML for a beautiful stock card"""
     # Get a gradient color based on the symbol
-    colors = ['#00D4FF', '#00FF88', '#FF3366', '#FFB800', '#8B5CF6', '#F472B6']
-    color = colors[hash(symbol) % len(colors)]
+    color = card_color(symbol)
     
-    st.markdown(f"""
+    return f"""
     <div style="
         background: linear-gradient(135deg, rgba(19, 26, 43, 0.9) 0%, rgba(26, 36, 56, 0.9) 100%);
         border: 1px solid #1E2A42;
@@ -908,23 +1121,96 @@ def display_stock_card_beautiful(symbol: str, company_name: str, sector: str, se
             </span>
         </div>
     </div>
-    """, unsafe_allow_html=True)
+    """.strip()
 
 # ===========================
 # INITIALIZE
 # ===========================
 
-init_db()
+@st.cache_resource
+def init_database():
+    """Create tables and indexes once per server process, not on every rerun"""
+    init_db()
+
+init_database()
 
+# Run on startup, after the tables exist; a failed check is retried next rerun
+if not ensure_demo_user():
+    ensure_demo_user.clear()
+
+# Each service is created on first use, so pages that never scan skip the monitor
 @st.cache_resource
-def get_services():
-    return {
-        'fmp': FMPClient(),
-        'ai': AIAnalyzer(),
-        'monitor': PortfolioNewsMonitor()
-    }
+def get_fmp_client():
+    from services.fmp_client import FMPClient
+    return FMPClient()
+
+@st.cache_resource
+def get_ai_analyzer():
+    # Imported here: the anthropic SDK takes about a second to import
+    from services.ai_analyzer import AIAnalyzer
+    return AIAnalyzer()
 
-services = get_services()
+@st.cache_resource
+def get_monitor():
+    # Imported here: main pulls in every scan-side service
+    from main import PortfolioNewsMonitor
+    return PortfolioNewsMonitor()
+
+@st.cache_resource
+def get_scan_executor():
+    """Single worker: at most one manual scan runs at a time on this server"""
+    return ThreadPoolExecutor(max_workers=1)
+
+@st.fragment(run_every=2)
+def scan_status():
+    """Poll the background scan and rerun the app once it finishes"""
+    future = st.session_state.scan_future
+    if not future.done():
+        st.info("⏳ Scanning news sources... This may take 30-60 seconds. You can keep using the app meanwhile.")
+        return
+    
+    del st.session_state.scan_future
+    error = future.exception()
+    st.session_state.scan_result = f"Scan failed: {error}" if error else None
+    get_user_stats.clear()
+    st.rerun()
+
+def page_fragment(render_page):
+    """Run a page body as a fragment with its own session and user
+    
+    Widget changes inside the page then rerun only the page, not the sidebar and
+    header; st.rerun() still reruns the whole app. The session is opened per run
+    (the script-level one is closed by the time a fragment reruns).
+    """
+    @st.fragment
+    @wraps(render_page)
+    def run():
+        db = next(get_db())
+        try:
+            # Holdings ride along in the same query for the Dashboard and Portfolio pages
+            user = db.query(User).options(joinedload(User.holdings)).filter(
+                User.email == st.session_state.user_email
+            ).first()
+            render_page(db, user)
+        finally:
+            db.close()
+    return run
+
+@st.cache_resource
+def install_query_counter():
+    """Count SQL statements per script thread (debug only), registered once per process"""
+    counts = {}
+    
+    @event.listens_for(engine, "before_cursor_execute")
+    def count_query(conn, cursor, statement, parameters, context, executemany):
+        thread_id = threading.get_ident()
+        counts[thread_id] = counts.get(thread_id, 0) + 1
+    
+    return counts
+
+if settings.debug:
+    sql_counts = install_query_counter()
+    sql_counts[threading.get_ident()] = 0
 
 if 'user_email' not in st.session_state:
     st.session_state.user_email = 'demo@example.com'
@@ -937,6 +1223,15 @@ if 'user_email' not in st.session_state:
 # SIDEBAR (SIMPLIFIED)
 # ===========================
 
+# Short-lived session for the sidebar (each page fragment opens its own),
+# closed even when a page later stops or reruns the script
+db = next(get_db())
+try:
+    user = db.query(User).filter(User.email == st.session_state.user_email).first()
+    user_stats = get_user_stats(db, user.id) if user else None
+finally:
+    db.close()
+
 with st.sidebar:
     # Minimal Logo/Brand
     st.markdown("""
@@ -946,12 +1241,8 @@ with st.sidebar:
     """, unsafe_allow_html=True)
     
     # User Profile (Compact)
-    db = next(get_db())
-    user = db.query(User).filter(User.email == st.session_state.user_email).first()
-    
     if user:
-        holdings_count = db.query(UserHolding).filter(UserHolding.user_id == user.id).count()
-        alerts_count = db.query(Notification).filter(Notification.user_id == user.id).count()
+        holdings_count, alerts_count = user_stats
         
         st.markdown(f"""
         <div style="background: var(--glass); border-radius: 8px; padding: 10px; border: 1px solid var(--glass-border);">
@@ -963,10 +1254,11 @@ with st.sidebar:
         </div>
         """, unsafe_allow_html=True)
     
-    db.close()
-    
     st.markdown("---")
     st.caption("v2.5 - Cyber Update ⚡")
+    if settings.debug:
+        # Filled in at the end of the script, once the page has run its queries
+        sql_caption = st.empty()
 
 # ===========================
 # TOP NAVIGATION
@@ -985,10 +1277,8 @@ st.markdown('<div class="neon-divider"></div>', unsafe_allow_html=True)
 # ===========================
 # PAGE 1: DASHBOARD
 # ===========================
-if page == "🏠 Dashboard":
-    # Market Pulse Header
-    render_market_pulse()
-    
+@page_fragment
+def dashboard_page(db: Session, user: User):
     st.markdown('<p class="main-header">Dashboard</p>', unsafe_allow_html=True)
     st.markdown('<p class="sub-header">Real-time insights for your portfolio</p>', unsafe_allow_html=True)
     
@@ -1034,7 +1324,7 @@ if page == "🏠 Dashboard":
                         <div style="display: flex; align-items: center; gap: 8px; margin-bottom: 4px;">
                              <span style="font-size: 1.2rem;">{alert['emoji']}</span>
                              <div style="font-size: 0.95rem; font-weight: 600; color: #FFFFFF;">
-                                {alert['title'][:80]}{'...' if len(alert['title']) > 80 else ''}
+                                {truncate_text(alert['title'], 80)}
                              </div>
                         </div>
                         <div style="font-size: 0.85rem; color: #CBD5E1; margin-bottom: 6px; padding-left: 28px;">
@@ -1053,16 +1343,12 @@ if page == "🏠 Dashboard":
         
         st.markdown("</div>", unsafe_allow_html=True)
     
-    db = next(get_db())
-    user = db.query(User).filter(User.email == st.session_state.user_email).first()
-    
     if not user:
         st.error("User not found. Run `python main.py setup` to create demo user.")
-        db.close()
-        st.stop()
+        return
         
-    # Query holdings for use in Portfolio section and Broker Alerts
-    holdings = db.query(UserHolding).filter(UserHolding.user_id == user.id).all()
+    # Holdings for the Portfolio section and Broker Alerts (loaded with the user)
+    holdings = user.holdings
     
     # ========================
     # 🚨 HIGH IMPACT ALERTS (New Dedicated Section)
@@ -1070,7 +1356,10 @@ if page == "🏠 Dashboard":
     # Filter: Last 7 days only
     cutoff_date = datetime.utcnow() - timedelta(days=7)
     
-    high_impact_alerts = db.query(Notification).join(NewsArticle).join(NewsAnalysis).filter(
+    high_impact_alerts = db.query(Notification).join(NewsArticle).join(NewsAnalysis).options(
+        *ALERT_LOAD_OPTIONS,
+        *DEV_LOAD_GUARD
+    ).filter(
         Notification.user_id == user.id,
         NewsArticle.published_date >= cutoff_date,
         NewsAnalysis.impact_score >= 7
@@ -1082,8 +1371,9 @@ if page == "🏠 Dashboard":
         # Display as a grid of prominent cards
         hi_cols = st.columns(3)
         for i, notif in enumerate(high_impact_alerts):
-            article = db.query(NewsArticle).filter(NewsArticle.id == notif.article_id).first()
-            analysis = db.query(NewsAnalysis).filter(NewsAnalysis.article_id == notif.article_id).first()
+            # Populated from the joined rows above
+            article = notif.article
+            analysis = article.analysis if article else None
             
             if article and analysis:
                 with hi_cols[i % 3]:
@@ -1096,7 +1386,7 @@ if page == "🏠 Dashboard":
                             {article.title}
                         </div>
                         <div style="font-size: 0.9rem; color: #94A3B8; margin-bottom: 1rem;">
-                            {analysis.summary[:100]}...
+                            {truncate_text(analysis.summary, 100)}
                         </div>
                             <div style="background: rgba(59, 130, 246, 0.1); color: #3B82F6; padding: 2px 8px; border-radius: 6px; font-weight: 600; font-size: 0.8rem;">
                                 {article.symbol}
@@ -1128,13 +1418,7 @@ if page == "🏠 Dashboard":
         
         if holdings:
             # Display beautiful stock cards in a 2-column sub-grid inside the left main column
-            cols = st.columns(2)
-            for idx, holding in enumerate(holdings):
-                profile = get_company_profile_cached(holding.symbol)
-                symbol, company_name, sector, sector_emoji = render_stock_card(holding.symbol, profile)
-                with cols[idx % 2]:
-                    # Updated style for card display
-                    display_stock_card_beautiful(symbol, company_name, sector, sector_emoji)
+            display_stock_card_grid(holdings, 2)
         else:
             st.info("📊 No stocks in your portfolio yet. Head to Portfolio to add some!")
         
@@ -1150,43 +1434,23 @@ if page == "🏠 Dashboard":
             </div>
             """, unsafe_allow_html=True)
         with col_refresh:
-            if st.button("🔄 Refresh", help="Refresh broker alerts (clears cache)"):
-                st.cache_data.clear()
-                st.rerun()
+            # Clearing in the callback lets the click's own rerun (this page only) fetch fresh data
+            st.button("🔄 Refresh", help="Refresh broker alerts (clears cache)", on_click=clear_feed_caches)
         
         # Fetch broker rating changes for portfolio stocks
         portfolio_symbols = [h.symbol for h in holdings] if holdings else []
         if portfolio_symbols:
             st.caption(f"Monitoring: {', '.join(portfolio_symbols)}")
         
-        broker_alerts = get_broker_rating_alerts_v4(portfolio_symbols)
+        broker_alerts = get_broker_rating_alerts_v4(tuple(sorted(set(portfolio_symbols))))
         
         if broker_alerts:
+            # Build every card first, then send them all in one markdown call
+            broker_cards = []
             for alert in broker_alerts[:5]:
-                action_type = alert.get('action_type', '')
-                is_negative = action_type in ['downgrade', 'target_lowered']
-                
-                # Color coding (Updated for new theme)
-                if is_negative:
-                    border_color = '#EF4444' # Red
-                    action_label = '⬇️ DOWNGRADE'
-                    bg_color = 'rgba(239, 68, 68, 0.05)'
-                    badge_color = '#EF4444'
-                elif action_type == 'upgrade':
-                    border_color = '#10B981' # Green
-                    action_label = '⬆️ UPGRADE'
-                    bg_color = 'rgba(16, 185, 129, 0.05)'
-                    badge_color = '#10B981'
-                elif action_type == 'initiated':
-                    border_color = '#3B82F6' # Blue
-                    action_label = '🆕 INITIATED'
-                    bg_color = 'rgba(59, 130, 246, 0.05)'
-                    badge_color = '#3B82F6'
-                else:
-                    border_color = '#64748B' # Slate
-                    action_label = '📊 RATING'
-                    bg_color = 'rgba(100, 116, 139, 0.05)'
-                    badge_color = '#64748B'
+                border_color, action_label, bg_color = BROKER_ACTION_STYLES.get(
+                    alert.get('action_type', ''), DEFAULT_BROKER_ACTION_STYLE
+                )
                 
                 headline = alert.get('headline', '')
                 
@@ -1196,7 +1460,7 @@ if page == "🏠 Dashboard":
                     
                 headline_html = ""
                 if headline:
-                    headline_html = f"<div style='font-size: 0.85rem; color: #94A3B8; font-style: italic; margin-top: 8px; border-top: 1px solid #334155; padding-top: 6px;'>" + headline[:100] + ('...' if len(headline) > 100 else '') + "</div>"
+                    headline_html = f"<div style='font-size: 0.85rem; color: #94A3B8; font-style: italic; margin-top: 8px; border-top: 1px solid #334155; padding-top: 6px;'>" + truncate_text(headline, 100) + "</div>"
 
                 content = f"""
                 <div style="
@@ -1208,7 +1472,7 @@ if page == "🏠 Dashboard":
                   margin-bottom: 0.75rem;
                 ">
                   <div style="display: flex; justify-content: space-between; margin-bottom: 8px;">
-                    <div style="font-weight: 700; color: {badge_color};">
+                    <div style="font-weight: 700; color: {border_color};">
                       {alert['symbol']} {action_label}
                     </div>
                     <div style="font-size: 0.8rem; color: #94A3B8;">
@@ -1228,7 +1492,8 @@ if page == "🏠 Dashboard":
                   {headline_html}
                 </div>
                 """
-                st.markdown(textwrap.dedent(content), unsafe_allow_html=True)
+                broker_cards.append(textwrap.dedent(content))
+            st.markdown("".join(broker_cards), unsafe_allow_html=True)
         else:
             st.markdown("""
             <div style="text-align: center; padding: 2rem; color: #64748B; background: #1E293B; border-radius: 12px;">
@@ -1245,36 +1510,36 @@ if page == "🏠 Dashboard":
         
         # Recent Alerts Feed - Now wider and cleaner
         # Filter: Last 7 days only
-        recent_alerts = db.query(Notification).join(NewsArticle).filter(
+        # Article and analysis come back in the same row (no per-alert lookups)
+        recent_alerts = db.query(Notification).join(
+            NewsArticle, Notification.article_id == NewsArticle.id
+        ).join(
+            NewsAnalysis, NewsAnalysis.article_id == NewsArticle.id
+        ).options(
+            *ALERT_LOAD_OPTIONS,
+            *DEV_LOAD_GUARD
+        ).filter(
             Notification.user_id == user.id,
             NewsArticle.published_date >= cutoff_date
         ).order_by(Notification.sent_at.desc()).limit(10).all()
         
         if recent_alerts:
+            # Build every card first, then send the whole feed in one markdown call
+            feed_cards = []
             for notif in recent_alerts:
-                article = db.query(NewsArticle).filter(NewsArticle.id == notif.article_id).first()
-                analysis = db.query(NewsAnalysis).filter(NewsAnalysis.article_id == notif.article_id).first()
+                article = notif.article
+                analysis = article.analysis if article else None
                 if article and analysis:
                     # Clean Modern Alert Card
-                    impact_score = analysis.impact_score
-                    if impact_score >= 8:
-                        impact_color = "#EF4444" # Red
-                        impact_label = "CRITICAL"
-                    elif impact_score >= 5:
-                        impact_color = "#F59E0B" # Amber
-                        impact_label = "MAJOR"
-                    else:
-                        impact_color = "#10B981" # Green
-                        impact_label = "FYI"
+                    impact_label, impact_color = IMPACT_STYLES[min(max(analysis.impact_score, 0), 10)]
                     
-                    st.markdown(f"""
+                    feed_cards.append(f"""
                     <div style="
                         background: #1E293B;
                         border: 1px solid #334155;
                         border-radius: 12px;
                         padding: 1.25rem;
                         margin-bottom: 1rem;
-                        transition: all 0.2s;
                     ">
                         <div style="display: flex; justify-content: space-between; align-items: flex-start; margin-bottom: 0.5rem;">
                             <div style="display: flex; gap: 8px; align-items: center;">
@@ -1299,49 +1564,33 @@ if page == "🏠 Dashboard":
                              <a href="{article.url}" target="_blank" style="text-decoration: none; color: #3B82F6; font-size: 0.85rem; font-weight: 600;">Read Article ↗</a>
                         </div>
                     </div>
-                    """, unsafe_allow_html=True)
+                    """)
+            st.markdown("".join(feed_cards), unsafe_allow_html=True)
         else:
             st.info("No alerts yet.")
     
     st.markdown(f'<div class="last-updated">Last updated: {datetime.utcnow().strftime("%Y-%m-%d %H:%M UTC")}</div>', unsafe_allow_html=True)
-    
-    db.close()
 
 # ===========================
 # PAGE 2: PORTFOLIO
 # ===========================
-elif page == "📊 Portfolio":
-    render_market_pulse()
-    
+@page_fragment
+def portfolio_page(db: Session, user: User):
     st.markdown('<p class="main-header">Portfolio</p>', unsafe_allow_html=True)
     st.markdown('<p class="sub-header">Manage your tracked stocks</p>', unsafe_allow_html=True)
     
-    db = next(get_db())
-    user = db.query(User).filter(User.email == st.session_state.user_email).first()
-    
     if not user:
         st.error("User not found.")
-        db.close()
-        st.stop()
+        return
     
     # Current Holdings - Enriched Cards
-    st.markdown("""
-    <div class="section-header">
-        <div class="section-icon">💼</div>
-        <div class="section-title">Your Watchlist</div>
-    </div>
-    """, unsafe_allow_html=True)
+    st.markdown(section_header_html("💼", "Your Watchlist"), unsafe_allow_html=True)
     
-    holdings = db.query(UserHolding).filter(UserHolding.user_id == user.id).all()
+    holdings = user.holdings
     
     if holdings:
         # Grid of beautiful stock cards
-        cols = st.columns(3)
-        for idx, holding in enumerate(holdings):
-            profile = get_company_profile_cached(holding.symbol)
-            symbol, company_name, sector, sector_emoji = render_stock_card(holding.symbol, profile)
-            with cols[idx % 3]:
-                display_stock_card_beautiful(symbol, company_name, sector, sector_emoji)
+        display_stock_card_grid(holdings, 3)
         
         st.divider()
         
@@ -1352,13 +1601,14 @@ elif page == "📊 Portfolio":
         symbol_to_delete = st.selectbox("Select stock to remove", symbols, label_visibility="collapsed")
         
         if st.button("Remove from Watchlist", type="secondary"):
-            holding_to_delete = db.query(UserHolding).filter(
+            # Delete in one statement; the row count tells us whether it existed
+            deleted = db.query(UserHolding).filter(
                 UserHolding.user_id == user.id,
                 UserHolding.symbol == symbol_to_delete
-            ).first()
-            if holding_to_delete:
-                db.delete(holding_to_delete)
-                db.commit()
+            ).delete(synchronize_session=False)
+            db.commit()
+            if deleted:
+                get_user_stats.clear()
                 st.success(f"✓ {symbol_to_delete} removed successfully!")
                 st.rerun()
     else:
@@ -1369,65 +1619,52 @@ elif page == "📊 Portfolio":
         </div>
         """, unsafe_allow_html=True)
     
-    st.markdown('<div class="custom-divider"></div>', unsafe_allow_html=True)
-    
     # Add New Stock
-    st.markdown("""
-    <div class="section-header">
-        <div class="section-icon">➕</div>
-        <div class="section-title">Add Stock</div>
-    </div>
-    """, unsafe_allow_html=True)
+    st.markdown(section_header_html("➕", "Add Stock", divider=True), unsafe_allow_html=True)
     
     col1, col2 = st.columns([2, 1])
     
     with col1:
-        new_symbol = st.text_input("Stock Symbol (e.g., AAPL, TSLA, NVDA)", key="new_symbol", placeholder="Enter ticker symbol...").upper()
+        new_symbol = st.text_input("Stock Symbol (e.g., AAPL, TSLA, NVDA)", key="new_symbol", placeholder="Enter ticker symbol...").strip().upper()
     
     with col2:
         st.markdown("<br>", unsafe_allow_html=True)
         if st.button("Add to Watchlist", type="primary", use_container_width=True):
-            if new_symbol:
-                existing = db.query(UserHolding).filter(
-                    UserHolding.user_id == user.id,
-                    UserHolding.symbol == new_symbol
-                ).first()
-                
-                if existing:
+            # Tickers are short alphanumerics, optionally with '.' or '-' (e.g. BRK.B)
+            if len(new_symbol) <= 10 and new_symbol.replace('.', '').replace('-', '').isalnum():
+                # The unique (user_id, symbol) index rejects duplicates, so a
+                # single INSERT both checks and adds
+                new_holding = UserHolding(
+                    user_id=user.id,
+                    symbol=new_symbol,
+                    quantity=1,
+                    avg_cost=0,
+                    asset_type='stock'
+                )
+                db.add(new_holding)
+                try:
+                    db.commit()
+                except IntegrityError:
+                    db.rollback()
                     st.warning(f"⚠️ {new_symbol} is already in your watchlist.")
                 else:
-                    new_holding = UserHolding(
-                        user_id=user.id,
-                        symbol=new_symbol,
-                        quantity=1,
-                        avg_cost=0,
-                        asset_type='stock'
-                    )
-                    db.add(new_holding)
-                    db.commit()
+                    get_user_stats.clear()
                     st.success(f"✓ {new_symbol} added to your watchlist!")
                     st.rerun()
             else:
                 st.error("Please enter a valid stock symbol.")
-    
-    db.close()
 
 # ===========================
 # PAGE 3: ALERTS
 # ===========================
-elif page == "🔔 Alerts":
-    render_market_pulse()
-    
+@page_fragment
+def alerts_page(db: Session, user: User):
     st.markdown('<p class="main-header">Alerts</p>', unsafe_allow_html=True)
     st.markdown('<p class="sub-header">Your news feed and notifications</p>', unsafe_allow_html=True)
     
-    db = next(get_db())
-    user = db.query(User).filter(User.email == st.session_state.user_email).first()
-    
     if not user:
         st.error("User not found.")
-        db.close()
-        st.stop()
+        return
     
     # Filters
     col1, col2, col3 = st.columns(3)
@@ -1446,12 +1683,16 @@ elif page == "🔔 Alerts":
             default=[]
         )
     
-    st.markdown('<div class="custom-divider"></div>', unsafe_allow_html=True)
+    render_divider()
     
     # Get alerts
     cutoff_date = datetime.utcnow() - timedelta(days=days_filter)
     
-    query = db.query(Notification).join(NewsArticle).join(NewsAnalysis).filter(
+    query = db.query(Notification).join(
+        NewsArticle, Notification.article_id == NewsArticle.id
+    ).join(
+        NewsAnalysis, NewsAnalysis.article_id == NewsArticle.id
+    ).filter(
         Notification.user_id == user.id,
         NewsArticle.published_date >= cutoff_date,
         NewsAnalysis.impact_score >= impact_filter
@@ -1460,33 +1701,34 @@ elif page == "🔔 Alerts":
     if category_filter:
         query = query.filter(NewsAnalysis.category.in_(category_filter))
     
-    notifications = query.order_by(NewsArticle.published_date.desc()).all()
+    # Count in SQL and only load the page being shown
+    page_size = 25
+    total_alerts = query.with_entities(func.count(Notification.id)).scalar()
+    page_count = max(1, -(-total_alerts // page_size))
+    
+    col_count, col_page = st.columns([3, 1])
+    with col_count:
+        st.markdown(f"**{total_alerts} alerts found**")
+    with col_page:
+        page_number = st.number_input("Page", min_value=1, max_value=page_count, value=1)
     
-    st.markdown(f"**{len(notifications)} alerts found**")
+    # The joined rows also populate the relationships, so this is one query
+    notifications = query.options(
+        *ALERT_LOAD_OPTIONS,
+        *DEV_LOAD_GUARD
+    ).order_by(NewsArticle.published_date.desc()).limit(page_size).offset((page_number - 1) * page_size).all()
     
     if notifications:
+        # Build every card first, then send the whole page in one markdown call
+        alert_cards = []
         for notif in notifications:
-            article = db.query(NewsArticle).filter(NewsArticle.id == notif.article_id).first()
-            analysis = db.query(NewsAnalysis).filter(NewsAnalysis.article_id == notif.article_id).first()
-            
+            article = notif.article
+            analysis = article.analysis if article else None
             if article and analysis:
-                impact = analysis.impact_score
-                if impact >= 8:
-                    impact_class = "impact-high"
-                    impact_label = "CRITICAL"
-                    impact_color = "#EF4444"
-                elif impact >= 5:
-                    impact_class = "impact-medium"
-                    impact_label = "MAJOR"
-                    impact_color = "#F59E0B"
-                else:
-                    impact_class = "impact-low"
-                    impact_label = "FYI"
-                    impact_color = "#10B981"
+                impact_label, impact_color = IMPACT_STYLES[min(max(analysis.impact_score, 0), 10)]
+                urgent_class = "urgent" if analysis.urgency in URGENT_LEVELS else "normal"
                 
-                urgent_class = "urgent" if analysis.urgency in ['Immediate', 'Hours'] else "normal"
-                
-                st.markdown(f"""
+                alert_cards.append(f"""
                 <div class="alert-card {urgent_class}">
                     <div style="display: flex; justify-content: space-between; align-items: flex-start;">
                         <div>
@@ -1503,13 +1745,17 @@ elif page == "🔔 Alerts":
                         <span>⏰ {analysis.urgency}</span>
                         <span style="margin-left: auto;"><a href="{article.url}" target="_blank" style="color: #00D4FF; text-decoration: none; font-weight: 600;">Read Source ↗</a></span>
                     </div>
+                    <details style="margin-top: 0.75rem; color: var(--text-secondary); font-size: 0.9rem;">
+                        <summary style="cursor: pointer;">View Details</summary>
+                        <div style="padding-top: 0.5rem;">
+                            <div><strong>Sentiment:</strong> {analysis.sentiment}</div>
+                            <div><strong>Affected Sector:</strong> {analysis.affected_sector}</div>
+                            <a href="{article.url}" target="_blank" style="color: #00D4FF; text-decoration: none;">Read Full Article →</a>
+                        </div>
+                    </details>
                 </div>
-                """, unsafe_allow_html=True)
-                
-                with st.expander("View Details"):
-                    st.write(f"**Sentiment:** {analysis.sentiment}")
-                    st.write(f"**Affected Sector:** {analysis.affected_sector}")
-                    st.markdown(f"[Read Full Article →]({article.url})")
+                """)
+        st.markdown("".join(alert_cards), unsafe_allow_html=True)
     else:
         st.markdown("""
         <div class="empty-state">
@@ -1517,31 +1763,21 @@ elif page == "🔔 Alerts":
             <div class="empty-state-text">No alerts match your criteria. Try adjusting the filters.</div>
         </div>
         """, unsafe_allow_html=True)
-    
-    db.close()
 
 # ===========================
 # PAGE 4: SETTINGS
 # ===========================
-elif page == "⚙️ Settings":
+@page_fragment
+def settings_page(db: Session, user: User):
     st.markdown('<p class="main-header">Settings</p>', unsafe_allow_html=True)
     st.markdown('<p class="sub-header">Configure your account and preferences</p>', unsafe_allow_html=True)
     
-    db = next(get_db())
-    user = db.query(User).filter(User.email == st.session_state.user_email).first()
-    
     if not user:
         st.error("User not found.")
-        db.close()
-        st.stop()
+        return
     
     # User Info Section
-    st.markdown("""
-    <div class="section-header">
-        <div class="section-icon">👤</div>
-        <div class="section-title">Account Information</div>
-    </div>
-    """, unsafe_allow_html=True)
+    st.markdown(section_header_html("👤", "Account Information"), unsafe_allow_html=True)
     
     col1, col2 = st.columns(2)
     
@@ -1562,15 +1798,8 @@ elif page == "⚙️ Settings":
         st.session_state.user_email = new_email
         st.rerun()
     
-    st.markdown('<div class="custom-divider"></div>', unsafe_allow_html=True)
-    
     # Notification Preferences
-    st.markdown("""
-    <div class="section-header">
-        <div class="section-icon">🔔</div>
-        <div class="section-title">Notification Preferences</div>
-    </div>
-    """, unsafe_allow_html=True)
+    st.markdown(section_header_html("🔔", "Notification Preferences", divider=True), unsafe_allow_html=True)
     
     st.info("💡 Advanced settings like impact threshold and polling frequency can be found in `config/settings.py`")
     
@@ -1584,31 +1813,21 @@ elif page == "⚙️ Settings":
         | SMTP Host | **{settings.smtp_host}** |
         """)
     
-    st.markdown('<div class="custom-divider"></div>', unsafe_allow_html=True)
-    
     # Danger Zone
-    st.markdown("""
-    <div class="section-header">
-        <div class="section-icon">⚠️</div>
-        <div class="section-title">Danger Zone</div>
-    </div>
-    """, unsafe_allow_html=True)
+    st.markdown(section_header_html("⚠️", "Danger Zone", divider=True), unsafe_allow_html=True)
     
     if st.button("Clear All Alerts", type="secondary"):
-        notifications = db.query(Notification).filter(Notification.user_id == user.id).all()
-        for n in notifications:
-            db.delete(n)
+        # One DELETE statement instead of loading and deleting every row
+        db.query(Notification).filter(Notification.user_id == user.id).delete(synchronize_session=False)
         db.commit()
+        get_user_stats.clear()
         st.warning("All alerts have been cleared.")
-    
-    db.close()
 
 # ===========================
 # PAGE 5: RUN SCAN
 # ===========================
-elif page == "🚀 Run Scan":
-    render_market_pulse()
-    
+@page_fragment
+def run_scan_page(db: Session, user: User):
     st.markdown('<p class="main-header">Run Scan</p>', unsafe_allow_html=True)
     st.markdown('<p class="sub-header">Manually trigger a portfolio news scan</p>', unsafe_allow_html=True)
     
@@ -1625,29 +1844,27 @@ elif page == "🚀 Run Scan":
     col1, col2, col3 = st.columns([1, 2, 1])
     with col2:
         if st.button("⚡ Launch Scan", type="primary", use_container_width=True):
-            with st.spinner("Scanning news sources... This may take 30-60 seconds."):
-                try:
-                    services['monitor'].run_monitoring_cycle()
-                    st.success("✓ Scan completed! Check your email and the Alerts tab for results.")
-                    st.balloons()
-                except Exception as e:
-                    st.error(f"Scan failed: {e}")
-    
-    st.markdown('<div class="custom-divider"></div>', unsafe_allow_html=True)
+            # Run in the background so reruns aren't blocked for the whole scan
+            if 'scan_future' not in st.session_state:
+                st.session_state.scan_future = get_scan_executor().submit(
+                    get_monitor().run_monitoring_cycle
+                )
+        
+        if 'scan_future' in st.session_state:
+            scan_status()
+        elif 'scan_result' in st.session_state:
+            error = st.session_state.pop('scan_result')
+            if error:
+                st.error(error)
+            else:
+                st.success("✓ Scan completed! Check your email and the Alerts tab for results.")
+                st.balloons()
     
     # Last Scan Info
-    st.markdown("""
-    <div class="section-header">
-        <div class="section-icon">📊</div>
-        <div class="section-title">Last Scan</div>
-    </div>
-    """, unsafe_allow_html=True)
-    
-    db = next(get_db())
-    user = db.query(User).filter(User.email == st.session_state.user_email).first()
+    st.markdown(section_header_html("📊", "Last Scan", divider=True), unsafe_allow_html=True)
     
     if user:
-        last_notif = db.query(Notification).filter(
+        last_notif = db.query(Notification).options(*DEV_LOAD_GUARD).filter(
             Notification.user_id == user.id
         ).order_by(Notification.sent_at.desc()).first()
         
@@ -1660,12 +1877,28 @@ elif page == "🚀 Run Scan":
             """, unsafe_allow_html=True)
         else:
             st.info("No scans recorded yet. Run your first scan above!")
-    
-    db.close()
+
+if page == "🏠 Dashboard":
+    render_market_pulse()
+    dashboard_page()
+elif page == "📊 Portfolio":
+    render_market_pulse()
+    portfolio_page()
+elif page == "🔔 Alerts":
+    render_market_pulse()
+    alerts_page()
+elif page == "⚙️ Settings":
+    settings_page()
+elif page == "🚀 Run Scan":
+    render_market_pulse()
+    run_scan_page()
 
 # Footer
 st.markdown("""
 <div class="app-footer">
     <span class="footer-brand">StockPulse</span> v2.1 | Powered by Claude AI & Financial APIs
 </div>
-""", unsafe_allow_html=True)
\ No newline at end of file
+""", unsafe_allow_html=True)
+
+if settings.debug:
+    sql_caption.caption(f"🛠️ SQL queries this render: {sql_counts[threading.get_ident()]}")
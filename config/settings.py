@@ -16,6 +16,7 @@ class Settings(BaseSettings):
     fmp_base_url: str = Field(default="https://financialmodelingprep.com/api", env="FMP_BASE_URL")
     redis_url: str = Field(default="", env="REDIS_URL")
     database_url: str = Field(default="sqlite:///portfolio_news.db", env="DATABASE_URL")
+    cache_dir: str = Field(default=".cache", env="CACHE_DIR")
     
     # Email config
     smtp_host: str = Field(default="smtp.gmail.com", env="SMTP_HOST")
@@ -27,6 +28,7 @@ class Settings(BaseSettings):
     polling_interval_minutes: int = Field(default=60, env="POLLING_INTERVAL_MINUTES")
     news_lookback_hours: int = Field(default=24, env="NEWS_LOOKBACK_HOURS")
     impact_threshold: int = Field(default=6, env="IMPACT_THRESHOLD")
+    debug: bool = Field(default=False, env="DEBUG")
     
     class Config:
         env_file = ".env"
@@ -4,10 +4,13 @@ Portfolio News Alert - Main Application
 Monitors financial news and alerts users about portfolio-relevant updates
 """
 
+import asyncio
+import hashlib
 import schedule
 import time
 from datetime import datetime
 from typing import List, Dict
+from sqlalchemy import insert
 from sqlalchemy.orm import Session
 
 from models.database import (
@@ -25,6 +28,12 @@ from services.broker_upgrades_service import BrokerUpgradesService
 from config.settings import settings
 
 
+def news_content_hash(news_item: Dict) -> str:
+    """Hash of an article's title and text, used to reuse stored analyses"""
+    content = f"{news_item.get('title', '')}\n{news_item.get('text', '')}"
+    return hashlib.sha256(content.encode('utf-8')).hexdigest()
+
+
 class PortfolioNewsMonitor:
     def __init__(self):
         self.fmp = FMPClient()
@@ -45,7 +54,9 @@ class PortfolioNewsMonitor:
     
     def get_user_holdings_dict(self, db: Session, user_id: int) -> Dict[str, Dict]:
         """Get user holdings as a dict keyed by symbol"""
-        holdings = db.query(UserHolding).filter(
+        holdings = db.query(
+            UserHolding.symbol, UserHolding.quantity, UserHolding.avg_cost, UserHolding.asset_type
+        ).filter(
             UserHolding.user_id == user_id
         ).all()
         
@@ -96,13 +107,41 @@ class PortfolioNewsMonitor:
             urgency=analysis.get('urgency', 'Days'),
             category=analysis.get('category', 'Other'),
             summary=analysis.get('summary', ''),
-            affected_sector=analysis.get('affected_sector', 'Individual Stock Only')
+            affected_sector=analysis.get('affected_sector', 'Individual Stock Only'),
+            content_hash=news_content_hash(news_item)
         )
         db.add(analysis_record)
         db.commit()
         
         return article
     
+    def get_stored_analyses(self, db: Session, content_hashes: List[str]) -> Dict[str, Dict]:
+        """Get analyses already stored for these content hashes, keyed by hash"""
+        if not content_hashes:
+            return {}
+        
+        rows = db.query(
+            NewsAnalysis.content_hash,
+            NewsAnalysis.impact_score,
+            NewsAnalysis.sentiment,
+            NewsAnalysis.urgency,
+            NewsAnalysis.category,
+            NewsAnalysis.summary,
+            NewsAnalysis.affected_sector
+        ).filter(NewsAnalysis.content_hash.in_(content_hashes)).all()
+        
+        return {
+            row.content_hash: {
+                'impact_score': row.impact_score,
+                'sentiment': row.sentiment,
+                'urgency': row.urgency,
+                'category': row.category,
+                'summary': row.summary,
+                'affected_sector': row.affected_sector
+            }
+            for row in rows
+        }
+    
     def create_notification_record(self, db: Session, user_id: int, article_id: int):
         """Create notification record"""
         notification = Notification(
@@ -117,20 +156,26 @@ class PortfolioNewsMonitor:
         """Process news for a single user's portfolio"""
         print(f"Processing portfolio for user: {user.email}")
         
-        # Get user's holdings
-        symbols = self.get_user_portfolio_symbols(db, user.id)
+        # Get user's holdings (details are needed for all analysis)
+        holdings_dict = self.get_user_holdings_dict(db, user.id)
+        symbols = list(holdings_dict)
         if not symbols:
             print(f"  No holdings found for user {user.email}")
             return
         
         print(f"  Monitoring {len(symbols)} symbols: {', '.join(symbols)}")
         
-        # Get user holdings details (needed for all analysis)
-        holdings_dict = self.get_user_holdings_dict(db, user.id)
+        # Fetch all independent sources concurrently (each one is network-bound)
+        print(f"  Fetching macro, news, analyst and broker data...")
+        macro_snapshot, news_items, analyst_updates, broker_upgrades_data = await asyncio.gather(
+            asyncio.to_thread(self.macro_monitor.get_comprehensive_macro_snapshot),
+            asyncio.to_thread(self.fmp.get_portfolio_news, symbols, settings.news_lookback_hours),
+            asyncio.to_thread(self.fmp.get_portfolio_analyst_updates, symbols, 24),
+            asyncio.to_thread(self.broker_upgrades.get_recent_upgrades, symbols, 168)
+        )
         
         # 1. MACRO MONITORING - Check first as it can affect entire portfolio
         print(f"  Checking macro conditions...")
-        macro_snapshot = self.macro_monitor.get_comprehensive_macro_snapshot()
         high_impact_macro = self.macro_monitor.filter_high_impact_macro_events(macro_snapshot)
         
         analyzed_macro_events = []
@@ -148,7 +193,6 @@ class PortfolioNewsMonitor:
             print(f"  {len(analyzed_macro_events)} macro events meet notification threshold")
         
         # 2. COMPANY NEWS
-        news_items = self.fmp.get_portfolio_news(symbols, hours=settings.news_lookback_hours)
         print(f"  Found {len(news_items)} news items")
         
         # DEDUPLICATE news (e.g., multiple outlets reporting same NVDA earnings)
@@ -163,8 +207,18 @@ class PortfolioNewsMonitor:
         
         # Analyze news items (ASYNC)
         print("  Analyzing news with AI (Parallel)...")
+        # Skip the LLM for articles we've already analyzed (same title + text)
+        content_hashes = [news_content_hash(item) for item in news_items]
+        stored_analyses = self.get_stored_analyses(db, content_hashes)
+        to_analyze = [item for item, h in zip(news_items, content_hashes) if h not in stored_analyses]
+        print(f"  Reusing {len(news_items) - len(to_analyze)} stored analyses")
+        
         # Prepare news items with context for batch analysis
-        analyzed_news_results = await self.ai_analyzer.batch_analyze_async(news_items, holdings_dict)
+        fresh_results = iter(await self.ai_analyzer.batch_analyze_async(to_analyze, holdings_dict))
+        analyzed_news_results = [
+            {**item, 'analysis': stored_analyses[h]} if h in stored_analyses else next(fresh_results)
+            for item, h in zip(news_items, content_hashes)
+        ]
         
         processed_analyzed_news = []
         for news_w_analysis in analyzed_news_results:
@@ -182,13 +236,12 @@ class PortfolioNewsMonitor:
         
         # 3. ANALYST UPDATES (Price Targets & Ratings)
         print(f"  Checking analyst updates...")
-        analyst_updates = self.fmp.get_portfolio_analyst_updates(symbols, hours=24)
         
         analyzed_analyst_updates = []
+        # Get current prices for all updated symbols in one request
+        quotes = self.fmp.get_stock_quotes(list(analyst_updates.keys()))
         for symbol, updates in analyst_updates.items():
-            # Get current price
-            quote = self.fmp.get_stock_quote(symbol)
-            current_price = quote.get('price', 0)
+            current_price = quotes.get(symbol, {}).get('price', 0)
             
             # Analyze all updates for this symbol
             analyzed = self.analyst_analyzer.batch_analyze_analyst_updates(
@@ -204,8 +257,7 @@ class PortfolioNewsMonitor:
         print(f"  Found {len(analyzed_analyst_updates)} important analyst updates")
         
         # 4. BROKER UPGRADES (for sidebar)
-        print(f"  Fetching recent broker upgrades...")
-        broker_upgrades_data = self.broker_upgrades.get_recent_upgrades(symbols, hours=168)
+        print(f"  Checking recent broker upgrades...")
         upgrade_stats = self.broker_upgrades.get_upgrade_summary_stats(broker_upgrades_data)
         
         if upgrade_stats['has_upgrades']:
@@ -274,7 +326,6 @@ class PortfolioNewsMonitor:
             
     def run_monitoring_cycle(self):
         """Sync wrapper for async cycle (for scheduler compatibility)"""
-        import asyncio
         asyncio.run(self.run_monitoring_cycle_async())
     
     def start_scheduler(self):
@@ -314,17 +365,25 @@ def setup_sample_data(db: Session):
     db.add(user)
     db.flush()
     
-    # Add sample holdings
+    # Add sample holdings in one executemany INSERT
     sample_holdings = [
-        UserHolding(user_id=user.id, symbol="AAPL", quantity=10, avg_cost=150.00, asset_type="stock"),
-        UserHolding(user_id=user.id, symbol="MSFT", quantity=5, avg_cost=300.00, asset_type="stock"),
-        UserHolding(user_id=user.id, symbol="GOOGL", quantity=3, avg_cost=120.00, asset_type="stock"),
-        UserHolding(user_id=user.id, symbol="TSLA", quantity=8, avg_cost=200.00, asset_type="stock"),
-        UserHolding(user_id=user.id, symbol="NVDA", quantity=15, avg_cost=400.00, asset_type="stock"),
+        ("AAPL", 10, 150.00),
+        ("MSFT", 5, 300.00),
+        ("GOOGL", 3, 120.00),
+        ("TSLA", 8, 200.00),
+        ("NVDA", 15, 400.00),
     ]
     
-    for holding in sample_holdings:
-        db.add(holding)
+    db.execute(insert(UserHolding), [
+        {
+            'user_id': user.id,
+            'symbol': symbol,
+            'quantity': quantity,
+            'avg_cost': avg_cost,
+            'asset_type': "stock"
+        }
+        for symbol, quantity, avg_cost in sample_holdings
+    ])
     
     db.commit()
     print(f"Created sample user: {user.email} with {len(sample_holdings)} holdings")
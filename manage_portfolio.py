@@ -1,3 +1,4 @@
+from sqlalchemy import func
 from models.database import get_db, User, UserHolding
 
 def add_stock(symbol, quantity, avg_cost):
@@ -68,7 +69,15 @@ def view_portfolio():
         db.close()
         return
     
-    holdings = db.query(UserHolding).filter(UserHolding.user_id == user.id).all()
+    # Row values and the portfolio total are computed by the database
+    value = UserHolding.quantity * UserHolding.avg_cost
+    holdings = db.query(
+        UserHolding.symbol,
+        UserHolding.quantity,
+        UserHolding.avg_cost,
+        value.label('value'),
+        func.sum(value).over().label('total_value')
+    ).filter(UserHolding.user_id == user.id).all()
     
     print("\n" + "="*70)
     print("📊 CURRENT PORTFOLIO")
@@ -84,16 +93,11 @@ def view_portfolio():
         print(f"{'Symbol':<10} {'Quantity':>12} {'Avg Cost':>15} {'Total Value':>18}")
         print("-"*70)
         
-        total_value = 0
         for h in holdings:
-            qty = float(h.quantity)
-            cost = float(h.avg_cost)
-            value = qty * cost
-            total_value += value
-            print(f"{h.symbol:<10} {qty:>12.2f} ${cost:>14.2f} ${value:>17.2f}")
+            print(f"{h.symbol:<10} {float(h.quantity):>12.2f} ${float(h.avg_cost):>14.2f} ${float(h.value):>17.2f}")
         
         print("-"*70)
-        print(f"{'TOTAL':>37} ${total_value:>17.2f}")
+        print(f"{'TOTAL':>37} ${float(holdings[0].total_value):>17.2f}")
         print("-"*70)
         print(f"\nTotal Holdings: {len(holdings)} stocks")
     
@@ -0,0 +1,26 @@
+import re
+import sys
+
+
+def minify_css(css: str) -> str:
+    """Strip comments and redundant whitespace from a stylesheet"""
+    css = re.sub(r'/\*.*?\*/', '', css, flags=re.DOTALL)
+    css = re.sub(r'\s+', ' ', css)
+    css = re.sub(r'\s*([{};,>])\s*', r'\1', css)
+    css = re.sub(r':\s+', ':', css)
+    return css.replace(';}', '}').strip()
+
+
+def build(source="static/style.css"):
+    """Write the minified copy the app links (static/style.min.css)"""
+    target = source.replace('.css', '.min.css')
+    with open(source) as f:
+        css = minify_css(f.read())
+    with open(target, 'w') as f:
+        f.write(css + '\n')
+    print(f"✅ Wrote {target} ({len(css)} bytes)")
+
+
+if __name__ == "__main__":
+    # Re-run after every edit to static/style.css and commit both files
+    build(*sys.argv[1:])
@@ -1,4 +1,4 @@
-from sqlalchemy import create_engine, Column, Integer, String, Text, DateTime, Float, Boolean, ForeignKey, DECIMAL
+from sqlalchemy import create_engine, Column, Integer, String, Text, DateTime, Float, Boolean, ForeignKey, DECIMAL, Index, event, func, inspect, select, text
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, relationship
 from datetime import datetime
@@ -35,6 +35,7 @@ class NewsAnalysis(Base):
     category = Column(String(50))
     summary = Column(Text)
     affected_sector = Column(String(100))
+    content_hash = Column(String(64), index=True)  # sha256 of title + text, to reuse analyses
     analyzed_at = Column(DateTime, default=datetime.utcnow)
     
     # Relationship
@@ -57,6 +58,10 @@ class User(Base):
 
 class UserHolding(Base):
     __tablename__ = 'user_holdings'
+    __table_args__ = (
+        # One row per symbol per user; also serves user_id lookups
+        Index('uq_user_holdings_user_id_symbol', 'user_id', 'symbol', unique=True),
+    )
     
     id = Column(Integer, primary_key=True)
     user_id = Column(Integer, ForeignKey('users.id'))
@@ -72,10 +77,14 @@ class UserHolding(Base):
 
 class Notification(Base):
     __tablename__ = 'notifications'
+    __table_args__ = (
+        # Covers "this user's notifications, newest first"
+        Index('ix_notifications_user_id_sent_at', 'user_id', 'sent_at'),
+    )
     
     id = Column(Integer, primary_key=True)
     user_id = Column(Integer, ForeignKey('users.id'))
-    article_id = Column(Integer, ForeignKey('news_articles.id'))
+    article_id = Column(Integer, ForeignKey('news_articles.id'), index=True)
     notification_type = Column(String(20))  # email, push, sms
     sent_at = Column(DateTime, default=datetime.utcnow)
     read = Column(Boolean, default=False)
@@ -86,13 +95,74 @@ class Notification(Base):
 
 
 # Database setup
-engine = create_engine(settings.database_url)
+# Module-level engine so every rerun/scan reuses pooled connections;
+# pre-ping drops connections the server closed while the app sat idle
+engine = create_engine(settings.database_url, pool_size=5, pool_pre_ping=True)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 
+if engine.dialect.name == 'sqlite':
+    @event.listens_for(engine, "connect")
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        """WAL lets the dashboard read while the scanner writes; bigger page cache for reads"""
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        # Writers (Settings, Portfolio, a background scan) wait for each other
+        # instead of failing with "database is locked" after the default 5 s
+        cursor.execute("PRAGMA busy_timeout=30000")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute("PRAGMA cache_size=-65536")  # 64 MB
+        cursor.execute("PRAGMA temp_store=MEMORY")
+        cursor.close()
+
+
+_db_initialized = False
+
+
 def init_db():
-    """Initialize database tables"""
+    """Initialize database tables (no-op after the first call in a process)"""
+    global _db_initialized
+    if _db_initialized:
+        return
+    
     Base.metadata.create_all(bind=engine)
+    
+    # create_all skips existing tables, so add nullable columns introduced since then
+    inspector = inspect(engine)
+    for table in Base.metadata.sorted_tables:
+        existing = {c['name'] for c in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in existing or not column.nullable:
+                continue
+            try:
+                with engine.begin() as conn:
+                    conn.execute(text(
+                        f"ALTER TABLE {table.name} ADD COLUMN {column.name} "
+                        f"{column.type.compile(engine.dialect)}"
+                    ))
+            except Exception as e:
+                print(f"Could not add column {table.name}.{column.name}: {e}")
+    
+    # ...and indexes
+    for table in Base.metadata.sorted_tables:
+        existing = {ix['name'] for ix in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name in existing:
+                continue
+            try:
+                if index.unique:
+                    # Older databases may already hold duplicates; keep the first row of each
+                    keep = select(func.min(table.c.id)).group_by(*index.columns)
+                    with engine.begin() as conn:
+                        removed = conn.execute(table.delete().where(table.c.id.not_in(keep))).rowcount
+                    if removed:
+                        print(f"Removed {removed} duplicate row(s) from {table.name} before creating {index.name}")
+                index.create(bind=engine, checkfirst=True)
+            except Exception as e:
+                # e.g. a unique index over rows that already hold duplicates
+                print(f"Could not create index {index.name}: {e}")
+    
+    _db_initialized = True
 
 
 def get_db():
@@ -3,7 +3,20 @@ from datetime import datetime, timedelta
 from typing import List, Dict, Optional
 from config.settings import settings
 import redis
+import copy
 import json
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+
+try:
+    import diskcache
+except ImportError:
+    diskcache = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 
 class FMPClient:
@@ -20,6 +33,19 @@ class FMPClient:
         else:
             self.redis_client = None
         
+        # Requests currently on the wire, so identical concurrent calls share one
+        self._inflight: Dict[str, Future] = {}
+        self._inflight_lock = threading.Lock()
+        
+        # Cache disque optionnel (survit aux redémarrages quand Redis n'est pas configuré)
+        self.disk_cache = None
+        if not self.redis_client and settings.cache_dir and diskcache is not None:
+            try:
+                # 50 Mo max, les entrées les plus anciennes sont évincées
+                self.disk_cache = diskcache.Cache(f"{settings.cache_dir}/fmp", size_limit=50_000_000)
+            except:
+                self.disk_cache = None
+        
         # 🆕 SOURCES DE HAUTE QUALITÉ UNIQUEMENT
         # Ces sources publient de vraies nouvelles financières, pas des opinions
         self.trusted_sources = [
@@ -74,10 +100,64 @@ class FMPClient:
             'thanksgiving', 'christmas', 'holiday'  # Articles saisonniers non-pertinents
         ]
         
+    def _cache_get(self, cache_key: str):
+        """Return a cached response (Redis, or the disk cache), or None"""
+        try:
+            if self.redis_client:
+                cached = self.redis_client.get(cache_key)
+                if cached:
+                    return json.loads(cached)
+            elif self.disk_cache is not None:
+                return self.disk_cache.get(cache_key)
+        except:
+            pass
+        return None
+    
+    def _cache_set(self, cache_key: str, value, ttl: int):
+        """Store a response in Redis, or the disk cache, for ttl seconds"""
+        try:
+            if self.redis_client:
+                self.redis_client.setex(cache_key, ttl, json.dumps(value))
+            elif self.disk_cache is not None:
+                self.disk_cache.set(cache_key, value, expire=ttl)
+        except:
+            pass
+    
     def _make_request(self, endpoint: str, params: Dict = None) -> Dict:
-        """Make API request to FMP"""
+        """
+        Make API request to FMP
+        
+        Concurrent calls for the same endpoint and params wait for the
+        request already in flight instead of sending their own
+        """
         if params is None:
             params = {}
+        request_key = f"{endpoint}?{json.dumps(params, sort_keys=True, default=str)}"
+        
+        with self._inflight_lock:
+            future = self._inflight.get(request_key)
+            is_leader = future is None
+            if is_leader:
+                future = Future()
+                self._inflight[request_key] = future
+        
+        if not is_leader:
+            # Own copy, in case the caller mutates what it gets back
+            return copy.deepcopy(future.result())
+        
+        try:
+            result = self._send_request(endpoint, params)
+            future.set_result(result)
+            return result
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._inflight_lock:
+                del self._inflight[request_key]
+    
+    def _send_request(self, endpoint: str, params: Dict) -> Dict:
+        """Send a single GET request to FMP"""
         params['apikey'] = self.api_key
         
         url = f"{self.base_url}{endpoint}"
@@ -85,8 +165,11 @@ class FMPClient:
         try:
             response = requests.get(url, params=params, timeout=10)
             response.raise_for_status()
+            # orjson décode plus vite que le json de la stdlib
+            if orjson is not None:
+                return orjson.loads(response.content)
             return response.json()
-        except requests.exceptions.RequestException as e:
+        except (requests.exceptions.RequestException, ValueError) as e:
             print(f"FMP API Error: {e}")
             return []
     
@@ -188,14 +271,10 @@ class FMPClient:
         """
         cache_key = f"fmp_news:{','.join(tickers) if tickers else 'general'}:{datetime.utcnow().strftime('%Y%m%d%H')}"
         
-        # Check cache (si Redis disponible)
-        if self.redis_client:
-            try:
-                cached = self.redis_client.get(cache_key)
-                if cached:
-                    return json.loads(cached)
-            except:
-                pass
+        # Check cache
+        cached = self._cache_get(cache_key)
+        if cached is not None:
+            return cached
         
         if tickers:
             # Get news for specific tickers
@@ -226,12 +305,8 @@ class FMPClient:
         # Limiter au nombre demandé
         quality_news = quality_news[:limit]
         
-        # Cache for 1 hour (si Redis disponible)
-        if self.redis_client:
-            try:
-                self.redis_client.setex(cache_key, 3600, json.dumps(quality_news))
-            except:
-                pass
+        # Cache for 1 hour
+        self._cache_set(cache_key, quality_news, 3600)
         
         print(f"    Filtered {len(news)} → {len(quality_news)} quality news items")
         
@@ -241,23 +316,15 @@ class FMPClient:
         """Get press releases for a specific symbol"""
         cache_key = f"fmp_press:{symbol}:{datetime.utcnow().strftime('%Y%m%d')}"
         
-        if self.redis_client:
-            try:
-                cached = self.redis_client.get(cache_key)
-                if cached:
-                    return json.loads(cached)
-            except:
-                pass
+        cached = self._cache_get(cache_key)
+        if cached is not None:
+            return cached
         
         params = {'limit': limit}
         releases = self._make_request(f'/v3/press-releases/{symbol}', params)
         
-        # Cache for 6 hours (si Redis disponible)
-        if self.redis_client:
-            try:
-                self.redis_client.setex(cache_key, 21600, json.dumps(releases))
-            except:
-                pass
+        # Cache for 6 hours
+        self._cache_set(cache_key, releases, 21600)
         
         return releases
     
@@ -268,13 +335,9 @@ class FMPClient:
         """
         cache_key = f"fmp_price_target:{symbol}:{datetime.utcnow().strftime('%Y%m%d%H')}"
         
-        if self.redis_client:
-            try:
-                cached = self.redis_client.get(cache_key)
-                if cached:
-                    return json.loads(cached)
-            except:
-                pass
+        cached = self._cache_get(cache_key)
+        if cached is not None:
+            return cached
         
         # Get price targets
         targets = self._make_request(f'/v4/price-target', {'symbol': symbol})
@@ -288,12 +351,8 @@ class FMPClient:
             'rating_changes': upgrades if isinstance(upgrades, list) else []
         }
         
-        # Cache for 2 hours (si Redis disponible)
-        if self.redis_client:
-            try:
-                self.redis_client.setex(cache_key, 7200, json.dumps(combined))
-            except:
-                pass
+        # Cache for 2 hours
+        self._cache_set(cache_key, combined, 7200)
         
         return combined
     
@@ -301,22 +360,14 @@ class FMPClient:
         """Get analyst earnings estimates and consensus"""
         cache_key = f"fmp_estimates:{symbol}:{datetime.utcnow().strftime('%Y%m%d')}"
         
-        if self.redis_client:
-            try:
-                cached = self.redis_client.get(cache_key)
-                if cached:
-                    return json.loads(cached)
-            except:
-                pass
+        cached = self._cache_get(cache_key)
+        if cached is not None:
+            return cached
         
         estimates = self._make_request(f'/v3/analyst-estimates/{symbol}')
         
-        # Cache for 24 hours (si Redis disponible)
-        if self.redis_client:
-            try:
-                self.redis_client.setex(cache_key, 86400, json.dumps(estimates))
-            except:
-                pass
+        # Cache for 24 hours
+        self._cache_set(cache_key, estimates, 86400)
         
         return estimates
     
@@ -360,23 +411,39 @@ class FMPClient:
         """Get current stock price and basic info"""
         cache_key = f"fmp_quote:{symbol}:{datetime.utcnow().strftime('%Y%m%d%H%M')}"
         
-        if self.redis_client:
-            try:
-                cached = self.redis_client.get(cache_key)
-                if cached:
-                    return json.loads(cached)
-            except:
-                pass
+        cached = self._cache_get(cache_key)
+        if cached is not None:
+            return cached
         
         quote = self._make_request(f'/v3/quote/{symbol}')
         result = quote[0] if isinstance(quote, list) and len(quote) > 0 else {}
         
-        # Cache for 5 minutes (si Redis disponible)
-        if self.redis_client:
-            try:
-                self.redis_client.setex(cache_key, 300, json.dumps(result))
-            except:
-                pass
+        # Cache for 5 minutes
+        self._cache_set(cache_key, result, 300)
+        
+        return result
+    
+    def get_stock_quotes(self, symbols: List[str]) -> Dict[str, Dict]:
+        """
+        Get current quotes for several symbols in a single request
+        Returns dict mapping symbol -> quote
+        """
+        if not symbols:
+            return {}
+        
+        quotes = self._make_request(f"/v3/quote/{','.join(symbols)}")
+        result = {}
+        if isinstance(quotes, list):
+            for quote in quotes:
+                if isinstance(quote, dict) and quote.get('symbol'):
+                    result[quote['symbol']] = quote
+        
+        # Fallback: fetch whatever the batch endpoint skipped concurrently
+        missing = [s for s in symbols if s not in result]
+        if missing:
+            with ThreadPoolExecutor(max_workers=min(16, len(missing))) as executor:
+                for symbol, quote in zip(missing, executor.map(self.get_stock_quote, missing)):
+                    result[symbol] = quote
         
         return result
     
@@ -408,10 +475,13 @@ class FMPClient:
         
         # Batch symbols in groups of 5 to avoid overwhelming the API
         batch_size = 5
-        for i in range(0, len(symbols), batch_size):
-            batch = symbols[i:i + batch_size]
-            news = self.get_stock_news(tickers=batch, limit=100)
-            all_news.extend(news)
+        batches = [symbols[i:i + batch_size] for i in range(0, len(symbols), batch_size)]
+        
+        # Fetch the batches concurrently (network-bound)
+        if batches:
+            with ThreadPoolExecutor(max_workers=len(batches)) as executor:
+                for news in executor.map(lambda batch: self.get_stock_news(tickers=batch, limit=100), batches):
+                    all_news.extend(news)
         
         # Filter to recent news
         recent_news = self.filter_recent_news(all_news, hours)
@@ -433,9 +503,14 @@ class FMPClient:
         Returns dict mapping symbol -> analyst updates
         """
         updates = {}
+        if not symbols:
+            return updates
+        
+        # Fetch every symbol concurrently (network-bound)
+        with ThreadPoolExecutor(max_workers=min(16, len(symbols))) as executor:
+            all_analyst_data = list(executor.map(self.get_price_targets, symbols))
         
-        for symbol in symbols:
-            analyst_data = self.get_price_targets(symbol)
+        for symbol, analyst_data in zip(symbols, all_analyst_data):
             recent_data = self.filter_recent_analyst_actions(analyst_data, hours)
             
             # Only include if there are recent updates